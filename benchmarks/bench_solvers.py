@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np
+from sympy import cyclotomic_poly, expand, prod, symbols
+from sympy.abc import x
+from expression_cache import clear_caches
+from instrumentation import recording
+from newton import newton_solve, newton_roots_batch, polynomial_roots
+from hensel_lift import hensel_roots
+from congruences import congruence_roots
+from congruence_helpers import root_chains
+from composite_congruences import composite_congruence_roots
+from newton_system import newton_system_solve
+
+NOISE_FLOOR = 50e-6
+
+def wilkinson(degree):
+    """
+    Return the Wilkinson-style polynomial (x - 1)(x - 2)...(x - degree), expanded.
+
+    :param degree: the degree of the polynomial
+    :return: the polynomial as a sympy expression
+    """
+    return expand(prod(x - k for k in range(1, degree + 1)))
+
+def tridiagonal_system(size):
+    """
+    Return Broyden's tridiagonal system (3 - 2x_i)x_i - x_(i-1) - 2x_(i+1) + 1 = 0 in size
+    unknowns, with x_0 = x_(size+1) = 0, together with its unknowns.
+
+    :param size: the number of equations and unknowns
+    :return: a tuple containing the tuple of functions and the tuple of unknowns
+    """
+    unknowns = symbols(f"x1:{size + 1}")
+    padded = (0,) + unknowns + (0,)
+    functions = tuple((3 - 2 * padded[i]) * padded[i] - padded[i - 1] - 2 * padded[i + 1] + 1
+                      for i in range(1, size + 1))
+    return functions, unknowns
+
+def congruence_case(polynomial, prime, power):
+    """
+    Return a callable which solves f(x) === 0 (mod p^n) and returns the number of p-adic
+    digits found.
+    """
+    def run():
+        roots = congruence_roots(polynomial, prime, power)
+        return len(root_chains(roots or {})) * power
+    return run
+
+def hensel_case(polynomial, guess, prime, terms):
+    """
+    Return a callable which lifts the guess by Hensel's lemma and returns the number of
+    p-adic digits found.
+    """
+    def run():
+        hensel_roots(polynomial, guess, prime, terms)
+        return 2 ** (terms - 1)
+    return run
+
+def newton_case(polynomial, guess, digits):
+    """
+    Return a callable which runs Newton's method to the given number of digits and
+    returns that number.
+    """
+    def run():
+        newton_solve(polynomial, guess, digits)
+        return digits
+    return run
+
+def batch_case(polynomial, size):
+    """
+    Return a callable which runs the batch Newton solver over a square grid of about size
+    complex guesses and returns the number of guesses.
+    """
+    def run():
+        side = int(size ** 0.5)
+        real, imaginary = np.meshgrid(np.linspace(-2, 2, side), np.linspace(-2, 2, side))
+        newton_roots_batch(polynomial, real + 1j * imaginary)
+        return side * side
+    return run
+
+def roots_case(polynomial, degree):
+    """
+    Return a callable which finds every root of a polynomial at once and returns the
+    number of roots.
+    """
+    def run():
+        polynomial_roots(polynomial)
+        return degree
+    return run
+
+def composite_case(polynomial, modulus):
+    """
+    Return a callable which solves f(x) === 0 (mod m) for a composite modulus and returns
+    the number of solutions.
+    """
+    def run():
+        return sum(1 for _ in composite_congruence_roots(polynomial, modulus))
+    return run
+
+def system_case(size, jacobian, sparse):
+    """
+    Return a callable which solves Broyden's tridiagonal system in size unknowns with the
+    given Jacobian mode and returns the number of unknowns.
+    """
+    functions, unknowns = tridiagonal_system(size)
+    def run():
+        newton_system_solve(functions, unknowns, [-1.0] * size, jacobian=jacobian,
+                            sparse=sparse)
+        return size
+    return run
+
+def build_cases(quick=False):
+    """
+    Return the benchmark cases as a dictionary mapping each case's name to a tuple of the
+    callable which runs it and the unit of the work count that callable returns. The
+    cases sweep the polynomial degree, prime size, p-adic power, Newton target digits, and
+    batch size over fixed reference polynomials.
+
+    :param quick: boolean to specify if a smaller sweep should be used
+    :return: a dictionary of benchmark cases
+    """
+    square_root = x**2 - 2
+    cyclotomic = cyclotomic_poly(12, x)
+    powers = [10, 100] if quick else [10, 100, 1000]
+    degrees = [5, 10] if quick else [5, 10, 20]
+    digits = [15, 1000] if quick else [15, 1000, 10000]
+    batch_sizes = [10**3] if quick else [10**3, 10**5]
+    root_degrees = [50] if quick else [50, 300]
+    system_sizes = [50] if quick else [50, 300]
+    moduli = [10**12] if quick else [10**12, 10**30, (10**9 + 7) * (10**9 + 9)]
+
+    cases = {}
+    for power in powers:
+        cases[f"congruence/x^2-2/p=7/n={power}"] = (congruence_case(square_root, 7, power), "digits")
+    for prime in [13, 10009, 10**9 + 9]:
+        cases[f"congruence/cyclotomic12/p={prime}/n=20"] = (
+            congruence_case(cyclotomic, prime, 20), "digits")
+    for degree in degrees:
+        cases[f"congruence/wilkinson{degree}/p=10007/n=10"] = (
+            congruence_case(wilkinson(degree), 10007, 10), "digits")
+    for terms in [8, 12]:
+        cases[f"hensel/x^2-2/p=7/terms={terms}"] = (hensel_case(square_root, 3, 7, terms), "digits")
+    for digit_count in digits:
+        cases[f"newton/x^2-2/digits={digit_count}"] = (
+            newton_case(square_root, 1.0, digit_count), "digits")
+    for degree in degrees:
+        cases[f"newton/wilkinson{degree}/digits=15"] = (
+            newton_case(wilkinson(degree), degree + 0.3, 15), "digits")
+    for size in batch_sizes:
+        cases[f"batch/z^3-1/size={size}"] = (batch_case(x**3 - 1, size), "guesses")
+    for size in system_sizes:
+        for jacobian in ["newton", "reuse", "broyden"]:
+            for sparse in [False, True]:
+                layout = "sparse" if sparse else "dense"
+                cases[f"system/tridiagonal{size}/{jacobian}/{layout}"] = (
+                    system_case(size, jacobian, sparse), "unknowns")
+    for modulus in moduli:
+        cases[f"composite/x^3-x/m={modulus}"] = (composite_case(x**3 - x, modulus), "roots")
+    for degree in root_degrees:
+        cases[f"roots/x^{degree}+x+1"] = (roots_case(x**degree + x + 1, degree), "roots")
+
+    return cases
+
+def measure(run, repeat):
+    """
+    Run a benchmark case and return its best and median wall times over repeat runs, its
+    peak memory and solver counters (recorded in one extra run), its work per second, and
+    its function and derivative evaluations per second. The expression caches are cleared
+    before every run, so each run includes parsing and compiling.
+
+    :param run: a callable which runs the case and returns its work count
+    :param repeat: the number of timed runs
+    :return: a dictionary holding the measurements
+    """
+    times = []
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        work = run()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+
+    clear_caches()
+    tracemalloc.start()
+    with recording() as recorder:
+        run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    counters = recorder.to_dict()["counters"]
+    evaluations = (counters.get("function_evaluations", 0)
+                   + counters.get("derivative_evaluations", 0))
+    return {"seconds": best, "median_seconds": statistics.median(times), "peak_bytes": peak,
+            "work": work, "work_per_second": work / best if best > 0 else None,
+            "evaluations_per_second": evaluations / best if best > 0 and evaluations else None,
+            "counters": counters}
+
+def run_benchmarks(cases, repeat, pattern=None):
+    """
+    Run every case whose name contains the pattern and return the results keyed by name.
+
+    :param cases: a dictionary of benchmark cases from build_cases
+    :param repeat: the number of timed runs per case
+    :param pattern: a substring of the case names to run; None for all
+    :return: a dictionary mapping each case's name to its measurements
+    """
+    results = {}
+    for name, (run, unit) in cases.items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(run, repeat)
+        results[name]["unit"] = unit
+        rate = results[name]["evaluations_per_second"]
+        print(f"{name:45} {results[name]['seconds']:10.4f} s "
+              f"{results[name]['peak_bytes'] / 1024:10.1f} KiB "
+              f"{f'{rate:12.0f} evals/s' if rate else ''}", file=sys.stderr)
+    return results
+
+def compare(results, baseline, threshold, noise_floor=NOISE_FLOOR):
+    """
+    Compare results against a baseline and return the cases whose best wall time grew by
+    more than the threshold (as a fraction, so 0.2 means 20% slower) and by more than the
+    noise floor, so that timer noise on cases taking well under a millisecond is not
+    taken for a regression.
+
+    :param results: a dictionary of measurements from run_benchmarks
+    :param baseline: a dictionary of measurements from an earlier run
+    :param threshold: the largest allowed relative slowdown
+    :param noise_floor: the largest slowdown in seconds which is always allowed
+    :return: a list of (name, baseline seconds, current seconds) for each regression
+    """
+    regressions = []
+    for name, result in results.items():
+        if name in baseline:
+            before = baseline[name]["seconds"]
+            if result["seconds"] - before > max(before * threshold, noise_floor):
+                regressions.append((name, before, result["seconds"]))
+    return regressions
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Newton, Hensel, and "
+                                     "congruence solvers.")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown counted as a regression (default: 0.2)")
+    parser.add_argument("--noise-floor", dest="noise_floor", type=float, default=NOISE_FLOOR,
+                        help="slowdown in seconds never counted as a regression "
+                        "(default: 0.00005)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="run a smaller sweep")
+    arguments = parser.parse_args(arguments)
+
+    results = run_benchmarks(build_cases(arguments.quick), arguments.repeat, arguments.filter)
+    report = {"python": platform.python_version(), "machine": platform.machine(),
+              "timestamp": time.time(), "results": results}
+
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as stream:
+            baseline = json.load(stream)["results"]
+        regressions = compare(results, baseline, arguments.threshold,
+                              arguments.noise_floor)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.4f} s -> {after:.4f} s", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
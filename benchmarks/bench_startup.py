@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOTFINDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src",
+                          "rootfinder.py")
+
+# Commands on integer polynomials, which must start without importing sympy and within
+# the target, and other commands, which are only timed.
+INTEGER_COMMANDS = {
+    "congruence": ["congruence", "x**2 - 2", "--prime", "7", "--power", "3"],
+    "hensel": ["hensel", "x**2 - 2", "--prime", "7", "--accuracy", "4"],
+    "sweep": ["sweep", "x**2 + 1", "--bound", "100"],
+}
+OTHER_COMMANDS = {
+    "newton": ["newton", "x**2 - 2", "--guess", "1", "--accuracy", "10"],
+    "newton-symbolic": ["newton", "cos(x) - x", "--guess", "1", "--accuracy", "10"],
+}
+
+def wall_time(command, repeat):
+    """
+    Run a command repeat times and return its median wall time in seconds.
+
+    :param command: a list holding the program and its arguments
+    :param repeat: the number of runs
+    :return: the median number of seconds one run took
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def imported_packages(arguments):
+    """
+    Run rootfinder once with -X importtime and return the top-level packages it imported.
+
+    :param arguments: the rootfinder arguments
+    :return: a set of package names
+    """
+    run = subprocess.run([sys.executable, "-X", "importtime", ROOTFINDER, *arguments],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                         check=True)
+    packages = set()
+    for line in run.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            packages.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return packages
+
+def measure(repeat):
+    """
+    Time every rootfinder command and a bare interpreter, and return how long each command
+    took beyond the interpreter starting, along with whether it imported sympy or NumPy.
+
+    :param repeat: the number of timed runs per command
+    :return: a tuple of the bare interpreter's seconds and a dictionary of measurements
+    keyed by command name
+    """
+    bare = wall_time([sys.executable, "-c", "pass"], repeat)
+    results = {}
+    for name, arguments in {**INTEGER_COMMANDS, **OTHER_COMMANDS}.items():
+        seconds = wall_time([sys.executable, ROOTFINDER, *arguments], repeat)
+        packages = imported_packages(arguments)
+        results[name] = {"seconds": seconds, "overhead": seconds - bare,
+                         "sympy": "sympy" in packages, "numpy": "numpy" in packages}
+        print(f"{name:20} {seconds:8.3f} s {seconds - bare:8.3f} s over bare"
+              f"{'  sympy' if results[name]['sympy'] else ''}"
+              f"{'  numpy' if results[name]['numpy'] else ''}", file=sys.stderr)
+    return bare, results
+
+def failures(results, target):
+    """
+    Return a message for every integer command which imported sympy or took longer than
+    the target beyond a bare interpreter.
+
+    :param results: a dictionary of measurements from measure
+    :param target: the largest allowed overhead in seconds
+    :return: a list of messages
+    """
+    messages = []
+    for name in INTEGER_COMMANDS:
+        if results[name]["sympy"]:
+            messages.append(f"{name} imported sympy")
+        if results[name]["overhead"] > target:
+            messages.append(f"{name} took {results[name]['overhead']:.3f} s over a bare "
+                            f"interpreter (target {target:.3f} s)")
+    return messages
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Measure the cold start of the rootfinder "
+                                     "command line.")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--target", type=float, default=0.15,
+                        help="largest seconds an integer command may take beyond a bare "
+                        "interpreter (default: 0.15)")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per command")
+    arguments = parser.parse_args(arguments)
+
+    bare, results = measure(arguments.repeat)
+    if arguments.output:
+        report = {"python": platform.python_version(), "machine": platform.machine(),
+                  "timestamp": time.time(), "bare": bare, "results": results}
+        with open(arguments.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    messages = failures(results, arguments.target)
+    for message in messages:
+        print(f"FAILED {message}", file=sys.stderr)
+    if messages:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
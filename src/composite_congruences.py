@@ -0,0 +1,124 @@
+from itertools import product
+from math import prod
+from terminal_ui import get_composite_congruence_info
+from expression_cache import integer_polynomial
+from finite_field_helpers import factorize, roots_mod_p
+from congruence_helpers import count_congruence_solutions, lift_congruence_solutions
+import instrumentation as instr
+
+def prime_power_solutions(polynomial, modulus):
+    """
+    Given a polynomial f(x) with integer coefficients and a modulus m, factor m into prime
+    powers p^e and solve f(x) === 0 (mod p^e) for each of them, finding the roots mod p
+    with roots_mod_p and lifting them as congruence_roots does. The remaining prime powers
+    are not solved once one of them has no solutions, since then neither has m.
+
+    ex) For f(x) = x^2 - 1 and m = 24, return [(8, [1, 3, 5, 7]), (3, [1, 2])].
+
+    :param polynomial: a polynomial with integer coefficients
+    :param modulus: a positive int m
+    :return: a list of (p^e, sorted solutions mod p^e) pairs, one per prime dividing m
+    """
+    if modulus < 1:
+        raise ValueError(f"The modulus must be a positive integer, not {modulus}")
+
+    with instr.phase("compile"):
+        coefficients = integer_polynomial(polynomial)[0]
+    with instr.phase("factor"):
+        factors = factorize(modulus)
+
+    solutions = []
+    for prime, exponent in factors.items():
+        with instr.phase("roots_mod_p"):
+            base_roots = roots_mod_p(coefficients, prime)
+        with instr.phase("lift"):
+            roots = lift_congruence_solutions(coefficients, base_roots, prime, exponent)
+        solutions.append((prime ** exponent, roots))
+        if not roots:
+            break
+    return solutions
+
+def crt_solutions(solutions):
+    """
+    Given the solutions of a congruence modulo pairwise coprime moduli m_1, ..., m_k, yield
+    every solution modulo their product M by the Chinese remainder theorem, one at a time.
+    The solution with residues r_i is the sum of the r_i e_i mod M, where e_i is 1 mod m_i
+    and 0 mod every other m_j, so each r_i e_i is computed once and every solution costs k
+    additions. The solutions come in the order of the residues mod m_1, then m_2, and so
+    on, not in increasing order.
+
+    :param solutions: a list of (m_i, solutions mod m_i) pairs, as from prime_power_solutions
+    :return: a generator of the solutions mod M
+    """
+    modulus = prod(factor for factor, _ in solutions)
+    terms = []
+    for factor, roots in solutions:
+        cofactor = modulus // factor
+        basis = cofactor * pow(cofactor, -1, factor) % modulus
+        terms.append([root * basis % modulus for root in roots])
+
+    for combination in product(*terms):
+        yield sum(combination) % modulus
+
+def composite_congruence_roots(polynomial, modulus):
+    """
+    Given a polynomial f(x) with integer coefficients and a modulus m, yield every solution
+    of
+
+    f(x) === 0 (mod m)
+
+    in [0, m) as it is combined. The modulus is factored into prime powers p^e, the
+    congruence is solved modulo each of them, and the solutions are combined by the
+    Chinese remainder theorem. Only the solutions modulo each p^e are kept in memory, so
+    solution sets far larger than memory can be streamed; they do not come out sorted.
+
+    :param polynomial: a polynomial with integer coefficients
+    :param modulus: a positive int m
+    :return: a generator of the solutions mod m
+    """
+    yield from crt_solutions(prime_power_solutions(polynomial, modulus))
+
+def count_composite_congruence_roots(polynomial, modulus):
+    """
+    Given a polynomial f(x) with integer coefficients and a modulus m, return the number of
+    solutions of f(x) === 0 (mod m) in [0, m): the product of the numbers of solutions
+    modulo each prime power p^e dividing m, each counted by count_congruence_solutions
+    without listing or combining any solutions.
+
+    ex) For f(x) = x^2 and m = 2^60, return 2^30.
+
+    :param polynomial: a polynomial with integer coefficients
+    :param modulus: a positive int m
+    :return: the number of solutions mod m
+    """
+    if modulus < 1:
+        raise ValueError(f"The modulus must be a positive integer, not {modulus}")
+
+    with instr.phase("compile"):
+        coefficients = integer_polynomial(polynomial)[0]
+    with instr.phase("factor"):
+        factors = factorize(modulus)
+
+    count = 1
+    with instr.phase("count"):
+        for prime, exponent in factors.items():
+            count *= count_congruence_solutions(coefficients, prime, exponent)
+            if not count:
+                break
+    return count
+
+def main():
+    polynomial, modulus = get_composite_congruence_info()
+    print(f"Congruence: {polynomial} === 0 (mod {modulus})\n")
+
+    solutions = prime_power_solutions(polynomial, modulus)
+    for factor, roots in solutions:
+        print(f"Solutions mod {factor}: {roots}")
+
+    count = prod(len(roots) for _, roots in solutions)
+    print(f"\nThere are {count} solutions mod {modulus}.\n")
+    for i, root in enumerate(crt_solutions(solutions)):
+        print(f"Root_{i}: {root}")
+
+if __name__ == "__main__":
+    main()
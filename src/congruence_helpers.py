@@ -1,3 +1,10 @@
+from math import gcd
+from polynomial_helpers import derivative_coefficients, horner_mod
+from finite_field_helpers import roots_mod_p
+from hensel_helpers import residue_digits
+from lift_cache import lift_simple_root
+import instrumentation as instr
+
 def alpha(current_root, prev_root, modulus):
     """
     Return the next digit in the p-adic expansion of the root, given the current and previous
@@ -16,6 +23,21 @@ def alpha(current_root, prev_root, modulus):
     """
     return (current_root - prev_root) // modulus
 
+def expansion_digits(chain, prime):
+    """
+    Given a path [r_1, r_2, ..., r_n] through the tree of roots, with r_i a root mod p^i,
+    yield the digits of the p-adic expansion of its root, from the p^0 digit up to the
+    p^(n-1) digit, one at a time. These are the base-p digits of r_n, so they are read off
+    r_n alone rather than recovered from each pair of roots by alpha.
+
+    ex) For [3, 10, 108, 2166] and p = 7, yield 3, 1, 2, and 6.
+
+    :param chain: a list of roots mod p, p^2, ..., p^n lifting each other
+    :param prime: the prime number p
+    :return: a generator of the digits of the expansion
+    """
+    yield from residue_digits(chain[-1], prime, len(chain))
+
 def solves_congruence(value, prime, power):
     """
     Given a function value, prime, and a power, return true if this function value is
@@ -26,4 +48,191 @@ def solves_congruence(value, prime, power):
     :param power: the power of the modulus
     :return: true if the given function value is congruent to 0 mod prime^power; false otherwise
     """
-    return value % pow(prime, power) == 0
\ No newline at end of file
+    return value % pow(prime, power) == 0
+
+def lift_congruence_solutions(coefficients, roots, prime, power):
+    """
+    Given the integer coefficients of a polynomial f(x), its roots mod p, a prime p, and a
+    power n, return every solution of f(x) === 0 (mod p^n) in [0, p^n), sorted.
+
+    Each root is lifted one power of p at a time. A simple root r (f'(r) not 0 mod p) has
+    exactly one lift, so it is lifted straight to p^n by Hensel's lemma (through the active
+    lift_cache.LiftCache, if there is one). A singular root r
+    mod p^i (i >= 1) has f(r + tp^i) === f(r) (mod p^(i+1)) for every digit t, so either all p
+    candidates for the next digit are roots or none are, which one evaluation decides.
+
+    :param coefficients: a list of int coefficients of f from highest degree to lowest
+    :param roots: the roots of f mod p
+    :param prime: the prime number p
+    :param power: the power of the modulus
+    :return: a sorted list of the solutions mod p^n
+    """
+    recorder = instr.ACTIVE
+    slopes = derivative_coefficients(coefficients)
+    solutions = []
+    frontier = list(roots)
+    modulus = prime
+
+    for level in range(1, power):
+        next_modulus = modulus * prime
+        next_frontier = []
+
+        for root in frontier:
+            if recorder is not None:
+                recorder.count("derivative_evaluations")
+
+            if horner_mod(slopes, root, prime) != 0:
+                solutions.append(lift_simple_root(coefficients, slopes, root, prime, power))
+                if recorder is not None:
+                    for lifted_level in range(level + 1, power + 1):
+                        recorder.count(f"lifts_at_level_{lifted_level}")
+                continue
+
+            if recorder is not None:
+                recorder.count("function_evaluations")
+                recorder.count("candidates_tested", prime)
+            if horner_mod(coefficients, root, next_modulus) == 0:
+                next_frontier.extend(root + digit * modulus for digit in range(prime))
+
+        if recorder is not None:
+            recorder.count(f"lifts_at_level_{level + 1}", len(next_frontier))
+            recorder.iteration("congruence", level=level + 1, singular_roots=len(next_frontier))
+
+        frontier = next_frontier
+        modulus = next_modulus
+
+    solutions.extend(frontier)
+    return sorted(solutions)
+
+def shift_polynomial(coefficients, root, prime):
+    """
+    Given the integer coefficients of a polynomial f(x) (highest degree first), a root r,
+    and a prime p, return the coefficients of f(r + py) as a polynomial in y.
+
+    ex) For f(x) = x^2 - 2, r = 3, and p = 7, return [49, 42, 7] (49y^2 + 42y + 7).
+
+    :param coefficients: a list of int coefficients from highest degree to lowest
+    :param root: the int r
+    :param prime: the prime number p
+    :return: a list of int coefficients of f(r + py) from highest degree to lowest
+    """
+    shifted = []
+    for coefficient in coefficients:
+        # Multiply by (py + r), then add the next coefficient.
+        shifted = ([prime * first + root * second
+                    for first, second in zip(shifted + [0], [0] + shifted)] or [0])
+        shifted[-1] += coefficient
+    return shifted
+
+def content_valuation(coefficients, prime, power):
+    """
+    Return the largest k <= n such that p^k divides every coefficient of a polynomial.
+
+    :param coefficients: a list of int coefficients
+    :param prime: the prime number p
+    :param power: the largest power n worth finding
+    :return: the int k
+    """
+    content = gcd(*coefficients)
+    valuation = 0
+    while valuation < power and content % prime == 0:
+        content //= prime
+        valuation += 1
+    return valuation
+
+def count_congruence_solutions(coefficients, prime, power):
+    """
+    Given the integer coefficients of a polynomial f(x), a prime p, and a power n, return
+    the number of solutions of f(x) === 0 (mod p^n) in [0, p^n) without listing them, so
+    that congruences with far more solutions than fit in memory can be counted.
+
+    The tree of roots is walked as lift_congruence_solutions does, except that each
+    simple root counts as one solution, and every p lifts of a singular root mod p^i are
+    counted together: if f is p^k g with g not zero mod p, the solutions of f mod p^n are
+    p^k times those of g mod p^(n-k) (and all p^n if k >= n), and the lifts of a root r of
+    g mod p are the solutions of g(r + py), whose coefficients are all divisible by p.
+
+    ex) For f(x) = x^2 and p^n = 2^60, return 2^30 (the multiples of 2^30).
+
+    :param coefficients: a list of int coefficients of f from highest degree to lowest
+    :param prime: the prime number p
+    :param power: the power of the modulus
+    :return: the number of solutions mod p^n
+    """
+    total = 0
+    # Each entry adds weight times the number of solutions of polynomial mod p^power.
+    pending = [(list(coefficients), power, 1)]
+
+    while pending:
+        polynomial, power, weight = pending.pop()
+        valuation = content_valuation(polynomial, prime, power)
+        if valuation == power:
+            total += weight * prime ** power
+            continue
+        if valuation:
+            divisor = prime ** valuation
+            polynomial = [coefficient // divisor for coefficient in polynomial]
+            power -= valuation
+            weight *= divisor
+
+        slopes = derivative_coefficients(polynomial)
+        for root in roots_mod_p(polynomial, prime):
+            if power == 1 or horner_mod(slopes, root, prime) != 0:
+                total += weight
+                continue
+
+            # The lifts are r + py for y mod p^(power-1) with g(r + py) === 0 (mod p^power),
+            # and p divides every coefficient of g(r + py).
+            shifted = shift_polynomial(polynomial, root, prime)
+            valuation = content_valuation(shifted, prime, power)
+            if valuation == power:
+                total += weight * prime ** (power - 1)
+            else:
+                divisor = prime ** valuation
+                pending.append(([coefficient // divisor for coefficient in shifted],
+                                power - valuation, weight * divisor // prime))
+
+    return total
+
+def root_tree(solutions, prime, power):
+    """
+    Given the solutions of a congruence mod p^n, return them arranged as a tree: each root
+    mod p^i maps to a dictionary of its lifts mod p^(i+1), and the roots mod p^n map to
+    empty dictionaries.
+
+    ex) For f(x) = x^2 - 2 === 0 (mod 7^3), return {3: {10: {108: {}}}, 4: {39: {235: {}}}}.
+
+    :param solutions: the solutions of the congruence mod p^n
+    :param prime: the prime number p
+    :param power: the power of the modulus
+    :return: a dictionary holding the tree of roots mod p, p^2, ..., p^n
+    """
+    moduli = [pow(prime, level) for level in range(1, power + 1)]
+    tree = {}
+
+    for solution in sorted(solutions, key=lambda root: [root % modulus for modulus in moduli]):
+        node = tree
+        for modulus in moduli:
+            node = node.setdefault(solution % modulus, {})
+
+    return tree
+
+def root_chains(tree):
+    """
+    Given a tree of roots as returned by root_tree, return every path from a root mod p
+    down to a root mod p^n as a list [r_1, r_2, ..., r_n] with r_i a root mod p^i.
+
+    :param tree: a dictionary holding the tree of roots mod p, p^2, ..., p^n
+    :return: a list of lists, one for each root mod p^n
+    """
+    chains = []
+    stack = [([root], lifts) for root, lifts in reversed(tree.items())]
+
+    while stack:
+        chain, lifts = stack.pop()
+        if not lifts:
+            chains.append(chain)
+        for root, next_lifts in reversed(lifts.items()):
+            stack.append((chain + [root], next_lifts))
+
+    return chains
\ No newline at end of file
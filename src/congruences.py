@@ -1,6 +1,12 @@
 from terminal_ui import get_p_adic_congruences_info
-from newton_helpers import function_value
-from congruence_helpers import solves_congruence, alpha
+from functools import partial
+from expression_cache import integer_polynomial
+from polynomial_helpers import horner_mod
+from p_adic import PAdicInteger, lift_root
+from finite_field_helpers import roots_mod_p
+import instrumentation as instr
+from congruence_helpers import (expansion_digits, lift_congruence_solutions, root_tree,
+                                root_chains)
 
 def congruence_roots(polynomial, prime, power):
     """
@@ -9,49 +15,65 @@ def congruence_roots(polynomial, prime, power):
     f(x) === 0 (mod p^n)
 
     by starting with n = 1, then n = 2, and onwards until n == n. After every iteration,
-    one more digit will be known in the p-adic expansion of the root. If there are no
-    "base" roots mod p that solve the congruence, the polynomial has no roots in Z_p, so
-    return none.
+    one more digit will be known in the p-adic expansion of the root. The roots mod p are
+    found with roots_mod_p, so large primes are not scanned one residue at a time. Simple roots are
+    lifted directly by Hensel's lemma, and singular roots branch into all of their lifts
+    when they have any. If there are no roots mod p^n that solve the congruence, return none.
 
     :param polynomial: a polynomial with p-adic integer coefficients
     :param prime: the given prime number base by the user
     :param power: the power of the modulus
-    :return: a dictionary containing all of the distinct roots mod p and their individual
-    continuations as we solve the congruence mod higher powers of p; none if the polynomial
-    has no roots in Z_p
+    :return: a dictionary holding the tree of roots, where every root mod p^i maps to a
+    dictionary of its lifts mod p^(i+1) and the roots mod p^n map to empty dictionaries;
+    none if the congruence has no solutions
     """
-    roots = {}
-
-    for i in range(prime):
-        value = function_value(polynomial, i)
-        if solves_congruence(value, prime, 1):
-            roots[f"Base_Root_{i}"] = [i]
-
-    if len(roots) == 0:
+    with instr.phase("compile"):
+        coefficients = integer_polynomial(polynomial)[0]
+    with instr.phase("roots_mod_p"):
+        base_roots = roots_mod_p(coefficients, prime)
+    with instr.phase("lift"):
+        solutions = lift_congruence_solutions(coefficients, base_roots, prime, power)
+
+    if len(solutions) == 0:
         print(f"There are no roots in the {prime}-adic numbers.")
         return None
 
-    for i in range(2, power + 1):
-        for root in list(roots.values()):
-            j = 1
-            root_candidate = root[0] + prime * j
-            while root_candidate < pow(prime, i):
-                value = function_value(polynomial, root_candidate)
-                if solves_congruence(value, prime, i):
-                    roots[f"Base_Root_{root[0]}"].append(root_candidate)
-                j += 1
-                root_candidate = root[0] + prime * j
+    with instr.phase("tree"):
+        return root_tree(solutions, prime, power)
+
+def padic_roots(polynomial, prime, power):
+    """
+    Given a polynomial f(x), prime p, and a power of the modulus n, return the solutions of
+
+    f(x) === 0 (mod p^n)
+
+    as p-adic integers known to n digits, in the order of their residues. The simple
+    solutions (f'(x) not 0 mod p) lift to unique p-adic roots, so they are extended by
+    Hensel's lemma whenever more of their digits are asked for; the singular ones are
+    known to n digits only.
+
+    :param polynomial: a polynomial with p-adic integer coefficients
+    :param prime: the given prime number base by the user
+    :param power: the power of the modulus
+    :return: a list of PAdicIntegers
+    """
+    coefficients, slopes = integer_polynomial(polynomial)
+    solutions = lift_congruence_solutions(coefficients, roots_mod_p(coefficients, prime),
+                                          prime, power)
 
-    return roots
+    lifter = partial(lift_root, coefficients, slopes)
+    return [PAdicInteger(solution, prime, power,
+                         lifter if horner_mod(slopes, solution, prime) != 0 else None)
+            for solution in solutions]
 
 def compute_sequence(roots, prime):
     """
-    Given a dictionary of the base roots mod p mapping to the full expansions mod higher
-    powers of p, return a list of strings which each have the actual p-adic expansions
-    with the appropriate coefficients for each p^i.
+    Given the tree of roots mod p mapping to their lifts mod higher powers of p, return a
+    list of strings which each have the actual p-adic expansions with the appropriate
+    coefficients for each p^i.
 
-    ex) For a polynomial f(x) = x^2 - 2 === 0 (mod 7^4), one of the values of roots for the base
-    root of 3 might look like [3, 10, 108, 2166], which tells us that 
+    ex) For a polynomial f(x) = x^2 - 2 === 0 (mod 7^4), one of the paths through the tree
+    starting at the base root of 3 looks like [3, 10, 108, 2166], which tells us that 
 
     - f(3) === 0 (mod 7^1)
     - f(10) === 0 (mod 7^2)
@@ -63,29 +85,46 @@ def compute_sequence(roots, prime):
 
     3 + 1(7^1) + 2(7^2) + 6(7^3) = ...6213.
 
-    :param roots: a dictionary containing all of the distinct roots mod p and their individual
-    continuations as we solve the congruence mod higher powers of p
+    :param roots: a dictionary holding the tree of roots mod p, p^2, ..., p^n
     :param prime: the user's desired prime
     :return: a list of strings, each of which is a p-adic expansion of the root(s)
     """
-    sequences = []
-    
-    if roots:
-        for root_list in list(roots.values()):
-            digits = str(root_list[0])
-            sequence = f"{root_list[0]} + "
-
-            for i in range(1, len(root_list)):
-                coefficient = alpha(root_list[i], root_list[i-1], prime ** i)
-                sequence += f"{coefficient} ({prime}^{i})"
-                digits = str(coefficient) + digits
-                if i != len(root_list) - 1:
-                    sequence += " + "
-
-            sequence += f" = ...{digits}"
-            sequences.append(sequence)
-    
-    return sequences
+    return [expansion_string(chain, prime) for chain in root_chains(roots or {})]
+
+def expansion_terms(chain, prime):
+    """
+    Given a path [r_1, r_2, ..., r_n] through the tree of roots, yield the pieces of the
+    string compute_sequence shows for its root one at a time: the terms of its p-adic
+    expansion joined by " + ", followed by " = ..." and its digits from the highest power
+    of p down. Writing the pieces out as they are yielded avoids building the whole string.
+
+    :param chain: a list of roots mod p, p^2, ..., p^n lifting each other
+    :param prime: the user's desired prime
+    :return: a generator of strings which make up the expansion when joined
+    """
+    digits = []
+    for i, coefficient in enumerate(expansion_digits(chain, prime)):
+        digits.append(str(coefficient))
+        if i == 0:
+            yield f"{coefficient} + "
+        elif i == len(chain) - 1:
+            yield f"{coefficient} ({prime}^{i})"
+        else:
+            yield f"{coefficient} ({prime}^{i}) + "
+
+    yield " = ..."
+    yield from reversed(digits)
+
+def expansion_string(chain, prime):
+    """
+    Given a path [r_1, r_2, ..., r_n] through the tree of roots, return the string
+    compute_sequence shows for its root, joined from the pieces of expansion_terms.
+
+    :param chain: a list of roots mod p, p^2, ..., p^n lifting each other
+    :param prime: the user's desired prime
+    :return: a string holding the p-adic expansion of the root
+    """
+    return "".join(expansion_terms(chain, prime))
 
 def main():
     polynomial, prime, power = get_p_adic_congruences_info()
@@ -0,0 +1,223 @@
+from functools import lru_cache
+from polynomial_helpers import (coefficient_list, integer_coefficients, is_integer,
+                                derivative_coefficients, horner, parse_polynomial)
+
+CACHE_SIZE = 512
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_function(function):
+    """
+    Given a function as a string, return it parsed into a sympy expression, cached by
+    the string. The caches below are keyed by the expression itself, which sympy builds
+    in a canonical form, so inputs written differently but parsing to the same
+    expression (such as "x**2 - 2" and "-2 + x**2") share their cached evaluators.
+
+    :param function: a string holding a mathematical expression
+    :return: the parsed sympy expression
+    """
+    from sympy import parse_expr
+    return parse_expr(function)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def polynomial_from_coefficients(coefficients):
+    """
+    Given a tuple of coefficients ordered from the leading term down to the constant term,
+    return the polynomial they describe as a sympy expression in x.
+
+    ex) For (1, 0, -2), return x**2 - 2.
+
+    :param coefficients: a tuple of coefficients from highest degree to lowest
+    :return: the polynomial as a sympy expression
+    """
+    from sympy import Poly
+    from sympy.abc import x
+    return Poly(list(coefficients), x).as_expr()
+
+@lru_cache(maxsize=CACHE_SIZE)
+def derivative_expression(function):
+    """
+    Given a function f, return its derivative f' as a sympy expression, differentiating
+    each distinct function only once.
+
+    :param function: a sympy expression in x
+    :return: the derivative of the expression with respect to x
+    """
+    from sympy import diff
+    from sympy.abc import x
+    return diff(function, x)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def integer_polynomial(polynomial):
+    """
+    Given a polynomial f(x) with integer coefficients, return the modular Horner form of
+    f and f': their coefficients as plain ints, from the leading term down to the constant
+    term, ready for horner_mod.
+
+    :param polynomial: a sympy polynomial in x with integer coefficients, or a tuple of
+    int coefficients from parse_polynomial
+    :return: a tuple containing the coefficient tuples of f and f'
+    """
+    coefficients = tuple(integer_coefficients(polynomial))
+    return coefficients, tuple(derivative_coefficients(coefficients))
+
+def symbolic(function):
+    """
+    Return a function as a sympy expression, converting a tuple of coefficients (as
+    returned by parse_polynomial) into the polynomial it describes.
+
+    :param function: a sympy expression, or a tuple of coefficients from highest degree
+    to lowest
+    :return: the function as a sympy expression
+    """
+    if isinstance(function, tuple):
+        return polynomial_from_coefficients(function)
+    return function
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_function(function, exact=False, vectorized=False, multiprecision=False):
+    """
+    Given a function f, differentiate it once and return a pair of callables which
+    evaluate f and f' at an input value. Polynomials are compiled into Horner schemes
+    over float (or complex) coefficients, and every other function is compiled with
+    lambdify, so that no iteration has to differentiate or walk the expression tree
+    again. If exact
+    is true, the callables substitute into the sympy expressions instead and return
+    exact sympy results. If vectorized is true, the callables accept NumPy arrays
+    (real or complex) and evaluate them elementwise. If multiprecision is true, the
+    callables evaluate mpmath numbers at the working precision of the mpmath context
+    they are called in; integer coefficients are kept as exact ints for this. A polynomial
+    whose coefficients overflow a float is evaluated this way at every input as well.
+
+    The function may also be a tuple of int coefficients (as returned by parse_polynomial),
+    in which case sympy is only imported if exact is true.
+
+    The callables are cached for each function and combination of options.
+
+    :param function: a real-valued function, or a tuple of coefficients
+    :param exact: boolean to specify if the callables should return sympy results
+    :param vectorized: boolean to specify if the callables should accept NumPy arrays
+    :param multiprecision: boolean to specify if the callables should evaluate in mpmath
+    :return: a tuple containing the callables for f and f'
+    """
+    if exact:
+        from sympy.abc import x
+        function = symbolic(function)
+        derivative = derivative_expression(function)
+        return (lambda value: function.subs(x, value),
+                lambda value: derivative.subs(x, value))
+
+    coefficients = coefficient_list(function)
+    if multiprecision:
+        if coefficients is not None and all(is_integer(c) for c in coefficients):
+            coefficients = [int(coefficient) for coefficient in coefficients]
+            slopes = derivative_coefficients(coefficients)
+            return (lambda value: horner(coefficients, value),
+                    lambda value: horner(slopes, value))
+        from sympy import lambdify
+        from sympy.abc import x
+        derivative = derivative_expression(function)
+        return lambdify(x, function, "mpmath"), lambdify(x, derivative, "mpmath")
+
+    if coefficients is not None:
+        real = all(getattr(coefficient, "is_extended_real", True) for coefficient in coefficients)
+        try:
+            coefficients = [(float if real else complex)(coefficient)
+                            for coefficient in coefficients]
+        except OverflowError:
+            if vectorized:
+                raise ValueError("The coefficients are too large for floating point")
+            from mpmath import mpf
+            evaluate, derivative = compile_function(function, multiprecision=True)
+            return (lambda value: evaluate(mpf(value)),
+                    lambda value: derivative(mpf(value)))
+        except TypeError:
+            coefficients = None
+    if coefficients is not None:
+        slopes = derivative_coefficients(coefficients)
+        return (lambda value: horner(coefficients, value),
+                lambda value: horner(slopes, value))
+
+    from sympy import lambdify
+    from sympy.abc import x
+    derivative = derivative_expression(function)
+    modules = ["numpy"] if vectorized else ["math", "mpmath"]
+    return lambdify(x, function, modules), lambdify(x, derivative, modules)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_system(functions, variables, sparse=False):
+    """
+    Given a system of functions F = (f_1, ..., f_n) of the variables (x_1, ..., x_n),
+    differentiate it once and return a pair of callables which evaluate F and its Jacobian
+    at a NumPy vector of values. F is returned as a vector of floats. Only the entries
+    d f_i / d x_j with x_j appearing in f_i (and not differentiating to 0) are compiled,
+    so a loosely coupled system costs time in proportion to its couplings rather than n^2.
+    If sparse is false, the Jacobian is returned as an n by n array of floats; if sparse is
+    true, it is returned as a tuple of the row indices, column indices, and values of
+    those entries.
+
+    The callables are cached for each system and variable order.
+
+    ex) For ((x**2 + y**2 - 1, x - y), (x, y)), the Jacobian at (1, 2) is [[2, 4], [1, -1]].
+
+    :param functions: a tuple of sympy expressions
+    :param variables: a tuple of sympy symbols, as many as there are functions
+    :param sparse: boolean to specify if the Jacobian should be returned as sparse entries
+    :return: a tuple containing the callables for F and its Jacobian
+    """
+    import numpy as np
+    from sympy import diff, lambdify
+
+    system = lambdify([variables], list(functions), "numpy")
+    evaluate = lambda vector: np.array(system(vector), dtype=float)
+
+    index = {variable: column for column, variable in enumerate(variables)}
+    rows, columns, derivatives = [], [], []
+    for row, function in enumerate(functions):
+        for variable in sorted(function.free_symbols & set(variables), key=index.get):
+            derivative = diff(function, variable)
+            if derivative != 0:
+                rows.append(row)
+                columns.append(index[variable])
+                derivatives.append(derivative)
+
+    rows, columns = np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)
+    entries = lambdify([variables], derivatives, "numpy")
+    if sparse:
+        return evaluate, lambda vector: (rows, columns, np.array(entries(vector), dtype=float))
+
+    def jacobian(vector):
+        matrix = np.zeros((len(functions), len(variables)))
+        matrix[rows, columns] = entries(vector)
+        return matrix
+    return evaluate, jacobian
+
+CACHES = {
+    "parse": parse_function,
+    "parse_polynomial": parse_polynomial,
+    "coefficients": polynomial_from_coefficients,
+    "derivative": derivative_expression,
+    "polynomial": integer_polynomial,
+    "compiled": compile_function,
+    "system": compile_system,
+}
+
+def cache_statistics():
+    """
+    Return the hit and miss counts, current size, and maximum size of every cache in
+    this module.
+
+    :return: a dictionary mapping each cache's name to a dictionary of its statistics
+    """
+    statistics = {}
+    for name, cached in CACHES.items():
+        info = cached.cache_info()
+        statistics[name] = {"hits": info.hits, "misses": info.misses,
+                            "size": info.currsize, "maxsize": info.maxsize}
+    return statistics
+
+def clear_caches():
+    """
+    Empty every cache in this module and reset its statistics.
+    """
+    for cached in CACHES.values():
+        cached.cache_clear()
\ No newline at end of file
@@ -0,0 +1,386 @@
+from math import gcd
+from random import randrange
+from polynomial_helpers import horner_mod
+import instrumentation as instr
+
+WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+WITNESS_BOUND = 3317044064679887385961981
+TRIAL_BOUND = 1000
+RHO_ITERATIONS = 1 << 18
+MAX_LISTED_RESIDUES = 1 << 16
+
+def is_prime(number):
+    """
+    Return true if the number is prime, and false otherwise. Numbers below 3.3 * 10^24 are
+    decided by the Miller-Rabin test with the first 13 primes as witnesses, which is exact
+    in that range; larger numbers fall back to sympy.
+
+    :param number: an int
+    :return: true if the number is prime; false otherwise
+    """
+    if number < 2:
+        return False
+    for witness in WITNESSES:
+        if number % witness == 0:
+            return number == witness
+    if number >= WITNESS_BOUND:
+        from sympy import isprime
+        return isprime(number)
+
+    odd, shift = number - 1, 0
+    while odd % 2 == 0:
+        odd //= 2
+        shift += 1
+
+    for witness in WITNESSES:
+        value = pow(witness, odd, number)
+        if value in (1, number - 1):
+            continue
+        for _ in range(shift - 1):
+            value = value * value % number
+            if value == number - 1:
+                break
+        else:
+            return False
+    return True
+
+def pollard_brent(number, iterations=RHO_ITERATIONS):
+    """
+    Return a non-trivial factor of an odd composite number found by Brent's variant of
+    Pollard's rho method, or None if none turns up within about the given number of
+    iterations. The products of the differences are accumulated so that only one gcd is
+    taken per batch of steps.
+
+    :param number: an odd composite int
+    :param iterations: the largest number of steps to take over all tries
+    :return: a non-trivial factor of the number; None if none was found
+    """
+    batch = 128
+    steps = 0
+    for constant in range(1, 16):
+        y, length, product, factor = 2, 1, 1, 1
+        while factor == 1:
+            x = y
+            for _ in range(length):
+                y = (y * y + constant) % number
+            done = 0
+            while done < length and factor == 1:
+                saved = y
+                for _ in range(min(batch, length - done)):
+                    y = (y * y + constant) % number
+                    product = product * (x - y) % number
+                factor = gcd(product, number)
+                done += batch
+            steps += 2 * length
+            length *= 2
+            if steps > iterations:
+                return None
+
+        if factor == number:
+            factor = 1
+            while factor == 1:
+                saved = (saved * saved + constant) % number
+                factor = gcd(x - saved, number)
+        if factor != number:
+            return factor
+    return None
+
+def factorize(number):
+    """
+    Return the prime factorisation of a positive integer as a dictionary mapping each prime
+    to its exponent, in increasing order of the primes. Small factors are found by trial
+    division and the rest by pollard_brent; a cofactor which resists that is factored by
+    sympy.
+
+    ex) For 360, return {2: 3, 3: 2, 5: 1}.
+
+    :param number: a positive int
+    :return: a dictionary mapping each prime factor to its exponent
+    """
+    factors = {}
+    divisor = 2
+    while divisor < TRIAL_BOUND and divisor * divisor <= number:
+        while number % divisor == 0:
+            factors[divisor] = factors.get(divisor, 0) + 1
+            number //= divisor
+        divisor += 1 if divisor == 2 else 2
+
+    pending = [number] if number > 1 else []
+    while pending:
+        number = pending.pop()
+        if is_prime(number):
+            factors[number] = factors.get(number, 0) + 1
+            continue
+
+        factor = pollard_brent(number)
+        if factor is None:
+            from sympy import factorint
+            for prime, exponent in factorint(number).items():
+                factors[int(prime)] = factors.get(int(prime), 0) + exponent
+        else:
+            pending.extend((factor, number // factor))
+
+    return dict(sorted(factors.items()))
+
+def poly_trim(polynomial, prime):
+    """
+    Given the coefficients of a polynomial (highest degree first) and a prime p, return the
+    coefficients reduced mod p with any leading zeros removed. The zero polynomial is [].
+
+    :param polynomial: a list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: a list of coefficients in [0, p) with a non-zero leading coefficient
+    """
+    reduced = [coefficient % prime for coefficient in polynomial]
+    start = 0
+    while start < len(reduced) and reduced[start] == 0:
+        start += 1
+    return reduced[start:]
+
+def poly_sub(a, b, prime):
+    """
+    Return a(x) - b(x) over the integers mod p.
+
+    :param a: a list of int coefficients from highest degree to lowest
+    :param b: a list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: the trimmed coefficients of a - b mod p
+    """
+    length = max(len(a), len(b))
+    a = [0] * (length - len(a)) + list(a)
+    b = [0] * (length - len(b)) + list(b)
+    return poly_trim([u - v for u, v in zip(a, b)], prime)
+
+def convolve(a, b, prime):
+    """
+    Return the full convolution of two coefficient lists with entries in [0, p), reduced
+    mod p and without trimming. The lists are packed into single integers (Kronecker
+    substitution) so that the work is one big-integer multiplication instead of a Python
+    double loop. Short lists, where packing costs more than it saves, use the double loop.
+
+    :param a: a non-empty list of ints in [0, p)
+    :param b: a non-empty list of ints in [0, p)
+    :param prime: a prime number p
+    :return: a list of len(a) + len(b) - 1 ints in [0, p)
+    """
+    if min(len(a), len(b)) <= 8:
+        product = [0] * (len(a) + len(b) - 1)
+        for i, u in enumerate(a):
+            for j, v in enumerate(b):
+                product[i + j] += u * v
+        return [coefficient % prime for coefficient in product]
+
+    width = (2 * prime.bit_length() + min(len(a), len(b)).bit_length() + 7) // 8
+    packed_a = int.from_bytes(b"".join(c.to_bytes(width, "big") for c in a), "big")
+    packed_b = int.from_bytes(b"".join(c.to_bytes(width, "big") for c in b), "big")
+
+    size = len(a) + len(b) - 1
+    packed = (packed_a * packed_b).to_bytes(size * width, "big")
+    return [int.from_bytes(packed[i:i + width], "big") % prime
+            for i in range(0, size * width, width)]
+
+def poly_mul(a, b, prime):
+    """
+    Return a(x) * b(x) over the integers mod p.
+
+    :param a: a list of int coefficients from highest degree to lowest
+    :param b: a list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: the trimmed coefficients of a * b mod p
+    """
+    a = poly_trim(a, prime)
+    b = poly_trim(b, prime)
+    if not a or not b:
+        return []
+    return poly_trim(convolve(a, b, prime), prime)
+
+def poly_divmod(a, b, prime):
+    """
+    Return the quotient and remainder of a(x) divided by a non-zero b(x) over the
+    integers mod p.
+
+    :param a: a list of int coefficients from highest degree to lowest
+    :param b: a trimmed, non-zero list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: a tuple containing the trimmed quotient and remainder mod p
+    """
+    remainder = poly_trim(a, prime)
+    if len(remainder) < len(b):
+        return [], remainder
+
+    inverse = pow(b[0], -1, prime)
+    quotient = [0] * (len(remainder) - len(b) + 1)
+    for i in range(len(quotient)):
+        factor = remainder[i] * inverse % prime
+        quotient[i] = factor
+        if factor:
+            for j, coefficient in enumerate(b):
+                remainder[i + j] = (remainder[i + j] - factor * coefficient) % prime
+
+    return poly_trim(quotient, prime), poly_trim(remainder[len(quotient):], prime)
+
+def poly_monic(polynomial, prime):
+    """
+    Return the given non-zero polynomial scaled by the inverse of its leading coefficient
+    mod p, so that it becomes monic.
+
+    :param polynomial: a trimmed, non-zero list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: the coefficients of the monic polynomial mod p
+    """
+    inverse = pow(polynomial[0], -1, prime)
+    return [coefficient * inverse % prime for coefficient in polynomial]
+
+def poly_gcd(a, b, prime):
+    """
+    Return the monic greatest common divisor of a(x) and b(x) over the integers mod p,
+    computed by the Euclidean algorithm.
+
+    :param a: a list of int coefficients from highest degree to lowest
+    :param b: a list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: the coefficients of the monic gcd mod p ([] if both are zero)
+    """
+    a = poly_trim(a, prime)
+    b = poly_trim(b, prime)
+    while b:
+        a, b = b, poly_divmod(a, b, prime)[1]
+    return poly_monic(a, prime) if a else []
+
+def reversed_inverse(modulus, prime):
+    """
+    Given a monic polynomial f of degree n, return the power series inverse of its reversal
+    x^n f(1/x) mod x^(n-1), computed by Newton iteration I <-- I(2 - fI). The series is
+    listed from the constant term upwards, which is the reversal's natural order.
+
+    :param modulus: a monic list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: a list of the first n - 1 series coefficients in [0, p)
+    """
+    length = max(len(modulus) - 2, 1)
+    inverse = [1]
+    while len(inverse) < length:
+        size = min(2 * len(inverse), length)
+        error = [-c % prime for c in convolve(modulus[:size], inverse, prime)[:size]]
+        error[0] = (error[0] + 2) % prime
+        inverse = convolve(inverse, error, prime)[:size]
+    return inverse
+
+def poly_remainder(polynomial, modulus, inverse, prime):
+    """
+    Return polynomial(x) mod modulus(x) over the integers mod p, for a polynomial of degree
+    below 2 deg(modulus) - 1, using the series from reversed_inverse: the reversed quotient
+    is the reversed polynomial times that series, so division costs two multiplications.
+
+    :param polynomial: a trimmed list of int coefficients in [0, p) from highest degree to lowest
+    :param modulus: a monic list of int coefficients from highest degree to lowest
+    :param inverse: the series returned by reversed_inverse(modulus, prime)
+    :param prime: a prime number p
+    :return: the trimmed coefficients of the remainder
+    """
+    size = len(polynomial) - len(modulus) + 1
+    if size <= 0:
+        return polynomial
+    quotient = convolve(polynomial[:size], inverse[:size], prime)[:size]
+    product = convolve(quotient, modulus, prime)
+    tail = len(modulus) - 1
+    return poly_trim([u - v for u, v in zip(polynomial[-tail:], product[-tail:])], prime)
+
+def poly_powmod(base, exponent, modulus, prime):
+    """
+    Return base(x)^e reduced mod a monic modulus(x) over the integers mod p by repeated
+    squaring, so only O(log e) multiplications of polynomials of degree below deg(modulus)
+    occur.
+
+    :param base: a list of int coefficients from highest degree to lowest
+    :param exponent: a non-negative integer e
+    :param modulus: a monic list of int coefficients of positive degree
+    :param prime: a prime number p
+    :return: the coefficients of base^e mod (modulus, p)
+    """
+    inverse = reversed_inverse(modulus, prime)
+    result = [1]
+    base = poly_divmod(base, modulus, prime)[1]
+    while exponent:
+        if exponent & 1:
+            result = poly_remainder(poly_mul(result, base, prime), modulus, inverse, prime)
+        base = poly_remainder(poly_mul(base, base, prime), modulus, inverse, prime)
+        exponent >>= 1
+    return result
+
+def split_linear_factors(polynomial, prime):
+    """
+    Given a monic polynomial mod an odd prime p which is a product of distinct linear
+    factors, return its roots by Cantor-Zassenhaus equal-degree factorisation: for a random
+    a, gcd(g, (x + a)^((p-1)/2) - 1) splits g into a non-trivial factor about half the time.
+
+    :param polynomial: a monic list of int coefficients which splits into distinct linear factors
+    :param prime: an odd prime number p
+    :return: a list of the roots of the polynomial mod p
+    """
+    roots = []
+    pending = [polynomial]
+
+    while pending:
+        factor = pending.pop()
+        if len(factor) == 2:
+            roots.append(-factor[1] % prime)
+            continue
+        if len(factor) < 2:
+            continue
+
+        while True:
+            shift = randrange(prime)
+            power = poly_powmod([1, shift], (prime - 1) // 2, factor, prime)
+            divisor = poly_gcd(factor, poly_sub(power, [1], prime), prime)
+            if 1 < len(divisor) < len(factor):
+                pending.append(divisor)
+                pending.append(poly_monic(poly_divmod(factor, divisor, prime)[0], prime))
+                break
+
+    return roots
+
+def vanishes_mod_p(coefficients, prime):
+    """
+    Return true if every coefficient of a polynomial is divisible by p, so that every
+    residue mod p is a root of it, and false otherwise.
+
+    :param coefficients: a list of int coefficients
+    :param prime: a prime number p
+    :return: true if the polynomial is zero mod p; false otherwise
+    """
+    return all(coefficient % prime == 0 for coefficient in coefficients)
+
+def roots_mod_p(coefficients, prime):
+    """
+    Given the integer coefficients of a polynomial f(x) (highest degree first) and a prime p,
+    return the sorted list of distinct roots of f mod p. The roots are those of
+    g = gcd(f, x^p - x), where x^p is computed by repeated squaring mod f, and g is then
+    split with Cantor-Zassenhaus, so the running time is polynomial in deg f and log p.
+    Small primes are simply checked one residue at a time. If f is zero mod p, every
+    residue is a root, so a ValueError is raised instead of listing them once p exceeds
+    MAX_LISTED_RESIDUES; callers which only need to know this can test vanishes_mod_p.
+
+    :param coefficients: a list of int coefficients from highest degree to lowest
+    :param prime: a prime number p
+    :return: a sorted list of the roots of f mod p
+    """
+    polynomial = poly_trim(coefficients, prime)
+
+    if not polynomial:
+        if prime > MAX_LISTED_RESIDUES:
+            raise ValueError(f"Every residue mod {prime} is a root, too many to list")
+        return list(range(prime))
+    if prime < 64:
+        if instr.ACTIVE is not None:
+            instr.ACTIVE.count("candidates_tested", prime)
+            instr.ACTIVE.count("function_evaluations", prime)
+        return [value for value in range(prime) if horner_mod(polynomial, value, prime) == 0]
+    if len(polynomial) == 1:
+        return []
+
+    polynomial = poly_monic(polynomial, prime)
+    frobenius = poly_powmod([1, 0], prime, polynomial, prime)
+    split_part = poly_gcd(polynomial, poly_sub(frobenius, [1, 0], prime), prime)
+
+    return sorted(split_linear_factors(split_part, prime))
\ No newline at end of file
@@ -1,6 +1,10 @@
-from sympy import diff, Rational
-from sympy.abc import x
-from newton_helpers import function_value
+from expression_cache import derivative_expression
+import instrumentation as instr
+from polynomial_helpers import horner_mod
+
+# The n-th term of Hensel's iteration is a residue mod p^(2^(n-1)), so every term doubles
+# its length; beyond about this many bits a single lift takes seconds and the next minutes.
+MAX_LIFT_BITS = 1 << 18
 
 def hensel_new_guess(polynomial, old_guess, prime):
     """
@@ -17,11 +21,18 @@ def hensel_new_guess(polynomial, old_guess, prime):
     :param prime: a prime number p
     :return: the next consecutive guess if defined; else None
     """
+    recorder = instr.ACTIVE
+    if recorder is not None:
+        recorder.count("derivative_evaluations", 2)
+        recorder.count("function_evaluations")
+
     if hensel_derivative_is_zero(polynomial, prime, old_guess):
         return None
-    
+
+    from sympy import Rational
+    from newton_helpers import function_value
     numerator = function_value(polynomial, old_guess)
-    denominator = function_value(diff(polynomial, x), old_guess)
+    denominator = function_value(derivative_expression(polynomial), old_guess)
     return Rational(old_guess, 1) - numerator / denominator
 
 def hensel_derivative_is_zero(polynomial, prime, value):
@@ -34,5 +45,125 @@ def hensel_derivative_is_zero(polynomial, prime, value):
     :param value: a given input x value
     :return: true if f'(x) == 0 (mod p); false otherwise
     """
-    derivative_value = function_value(diff(polynomial, x), value)
-    return derivative_value % prime == 0
\ No newline at end of file
+    from newton_helpers import function_value
+    derivative_value = function_value(derivative_expression(polynomial), value)
+    return derivative_value % prime == 0
+
+def hensel_step_mod(coefficients, slopes, root, prime, modulus):
+    """
+    Given the integer coefficients of f(x) and f'(x), a root a of f mod some power of
+    p, a prime p, and a modulus p^k at most the square of that power, return the lift
+    of a mod p^k given by
+
+    a' = a - f(a) * [f'(a)]^(-1) (mod p^k).
+
+    If f'(a) is 0 mod p, the inverse does not exist; as such, return None.
+
+    :param coefficients: a list of int coefficients of f from highest degree to lowest
+    :param slopes: a list of int coefficients of f' from highest degree to lowest
+    :param root: a root of f modulo a smaller power of p
+    :param prime: a prime number p
+    :param modulus: the power of p to lift the root to
+    :return: the lifted root in [0, p^k) if defined; else None
+    """
+    recorder = instr.ACTIVE
+    if recorder is not None:
+        recorder.count("derivative_evaluations")
+
+    slope = horner_mod(slopes, root, modulus)
+    if slope % prime == 0:
+        return None
+
+    if recorder is not None:
+        recorder.count("function_evaluations")
+    return (root - horner_mod(coefficients, root, modulus) * pow(slope, -1, modulus)) % modulus
+
+def hensel_lift_mod(coefficients, slopes, root, prime, power):
+    """
+    Given the integer coefficients of f(x) and f'(x), a simple root a of f mod p, a
+    prime p, and a power n, return the unique lift of a to a root of f mod p^n. The
+    precision doubles at every step (k --> 2k), so only about log2(n) steps are needed.
+
+    :param coefficients: a list of int coefficients of f from highest degree to lowest
+    :param slopes: a list of int coefficients of f' from highest degree to lowest
+    :param root: a root of f mod p with f'(root) not 0 (mod p)
+    :param prime: a prime number p
+    :param power: the power of the modulus to lift the root to
+    :return: the lifted root in [0, p^n) if defined; else None
+    """
+    return hensel_extend_mod(coefficients, slopes, root % prime, prime, 1, power)
+
+def hensel_extend_mod(coefficients, slopes, root, prime, precision, power):
+    """
+    Given the integer coefficients of f(x) and f'(x), a root a of f mod p^k which is simple
+    (f'(a) not 0 mod p), a prime p, the precision k, and a power n >= k, return the unique
+    lift of a to a root of f mod p^n, doubling the precision at every step.
+
+    :param coefficients: a list of int coefficients of f from highest degree to lowest
+    :param slopes: a list of int coefficients of f' from highest degree to lowest
+    :param root: a simple root of f mod p^k
+    :param prime: a prime number p
+    :param precision: the power k of the modulus the root is known to
+    :param power: the power of the modulus to lift the root to
+    :return: the lifted root in [0, p^n) if defined; else None
+    """
+    precisions = []
+    while power > precision:
+        precisions.append(power)
+        power = (power + 1) // 2
+
+    for level in reversed(precisions):
+        root = hensel_step_mod(coefficients, slopes, root, prime, pow(prime, level))
+        if root is None:
+            return None
+    return root
+
+def max_hensel_terms(prime):
+    """
+    Given a prime p, return the largest accuracy (number of terms) which Hensel's iteration
+    accepts for it, that is the largest n for which p^(2^(n-1)) fits in MAX_LIFT_BITS bits.
+
+    ex) max_hensel_terms(7) -> 17, since 7^(2^16) has 3 * 2^16 bits at most
+
+    :param prime: a prime p
+    :return: the largest number of terms allowed
+    """
+    return (MAX_LIFT_BITS // prime.bit_length()).bit_length()
+
+def check_hensel_accuracy(prime, accuracy):
+    """
+    Given a prime p and an accuracy (number of terms), raise a ValueError if the last term,
+    the residue mod p^(2^(accuracy-1)), would be longer than MAX_LIFT_BITS bits.
+
+    :param prime: a prime p
+    :param accuracy: the number of terms desired by the user
+    """
+    limit = max_hensel_terms(prime)
+    if accuracy > limit:
+        raise ValueError(f"An accuracy of {accuracy} asks for the root mod {prime}^(2^"
+                         f"{accuracy - 1}); at most {limit} terms are allowed for p = {prime}")
+
+def residue_digits(value, prime, count):
+    """
+    Given a residue in [0, p^count), yield its count base-p digits, least significant first.
+    Long residues are split in half by a power of p and each half is converted on its own,
+    so converting n digits costs about as much as a few multiplications of n-digit numbers
+    instead of n divisions of one.
+
+    ex) For 2166 in base 7 with a count of 4, yield 3, 1, 2, and 6.
+
+    :param value: a residue mod p^count
+    :param prime: a prime number p
+    :param count: the number of digits to yield
+    :return: a generator of the digits of the residue
+    """
+    if count <= 64:
+        for _ in range(count):
+            value, digit = divmod(value, prime)
+            yield digit
+        return
+
+    half = count // 2
+    high, low = divmod(value, pow(prime, half))
+    yield from residue_digits(low, prime, half)
+    yield from residue_digits(high, prime, count - half)
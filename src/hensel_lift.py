@@ -1,45 +1,204 @@
+from itertools import count
 import hensel_helpers as hnsl
+from polynomial_helpers import horner_mod
+from expression_cache import integer_polynomial, symbolic
+from finite_field_helpers import roots_mod_p
 from terminal_ui import get_hensel_info
+import instrumentation as instr
+import lift_cache
 
-def hensel_roots(polynomial, initial_guess, prime, accuracy):
+def hensel_roots(polynomial, initial_guess, prime, accuracy, exact=False):
     """
     Given a polynomial with p-adic integer coefficients, an initial guess, a prime,
     and an accuracy, return the sequence of values obtained by applying Hensel's
     iteration. If the derivative evaluated at the initial guess is zero, then return
     an empty list and deem that there exist no roots in the p-adics for that particular
-    p.
+    p. This collects the guesses yielded by hensel_iterates.
 
     :param polynomial: a polynomial with p-adic integer coefficients
     :param initial_guess: an initial guess provided by the user
     :param prime: a prime p
-    :param accuracy: the number of terms desired by the user
+    :param accuracy: the number of terms desired by the user, at most
+    hnsl.max_hensel_terms(prime)
+    :param exact: boolean to specify if the guesses should be computed with sympy
     :return: a list of consecutive guesses computed by Hensel's lemma
     """
-    approximations = [initial_guess]
+    return list(hensel_iterates(polynomial, initial_guess, prime, accuracy, exact))
+
+def hensel_iterates(polynomial, initial_guess, prime, accuracy, exact=False):
+    """
+    Given a polynomial with p-adic integer coefficients, an initial guess, a prime,
+    and an accuracy, yield the initial guess and then every value obtained by applying
+    Hensel's iteration as soon as it is computed.
+
+    The iteration runs over plain integers: the n-th term is the canonical residue of
+    the root mod p^(2^(n-1)), so the precision doubles with every term, and so does the
+    work. An accuracy above hnsl.max_hensel_terms(prime) raises a ValueError. Pass
+    exact=True to obtain the sequence of exact rational guesses computed by sympy instead.
+
+    :param polynomial: a polynomial with p-adic integer coefficients
+    :param initial_guess: an initial guess provided by the user
+    :param prime: a prime p
+    :param accuracy: the number of terms desired by the user, at most
+    hnsl.max_hensel_terms(prime)
+    :param exact: boolean to specify if the guesses should be computed with sympy
+    :return: a generator of consecutive guesses computed by Hensel's lemma
+    """
+    if not exact:
+        yield from hensel_residue_iterates(polynomial, initial_guess, prime, accuracy)
+        return
+
+    hnsl.check_hensel_accuracy(prime, accuracy)
+    polynomial = symbolic(polynomial)
     guess = initial_guess
+    yield guess
 
     for _ in range(accuracy - 1):
         guess = hnsl.hensel_new_guess(polynomial, guess, prime)
-        if not guess:
+        if guess is None:
+            print(f"""The derivative of the next term is zero, and as such, 
+                  the method will likely fail. Therefore, there are no 
+                  solutions in the {prime}-adics.""")
+            return
+        else:
+            if instr.ACTIVE is not None:
+                instr.ACTIVE.iteration("hensel", guess=guess)
+            yield str(guess)
+
+def hensel_residues(polynomial, initial_guess, prime, accuracy):
+    """
+    Given a polynomial with integer coefficients, an integer initial guess which solves
+    f(x) === 0 (mod p), a prime, and an accuracy, return the residues of the p-adic root
+    mod p, p^2, p^4, ..., p^(2^(accuracy-1)) yielded by hensel_residue_iterates.
+
+    :param polynomial: a polynomial with integer coefficients
+    :param initial_guess: an integer initial guess provided by the user
+    :param prime: a prime p
+    :param accuracy: the number of terms desired by the user, at most
+    hnsl.max_hensel_terms(prime)
+    :return: a list of residues of the root mod p^(2^n)
+    """
+    return list(hensel_residue_iterates(polynomial, initial_guess, prime, accuracy))
+
+def hensel_residue_iterates(polynomial, initial_guess, prime, accuracy=None):
+    """
+    Given a polynomial with integer coefficients, an integer initial guess which solves
+    f(x) === 0 (mod p), a prime, and an accuracy, yield the residues of the p-adic root
+    mod p, p^2, p^4, ..., p^(2^(accuracy-1)), each lying in [0, p^k), as soon as each one is
+    lifted. An accuracy above hnsl.max_hensel_terms(prime) raises a ValueError before
+    anything is lifted, since every term is twice as long as the one before it. If the
+    accuracy is None, keep lifting until the consumer stops asking. If the
+    guess is not a root mod p or the derivative at the guess is zero mod p, stop after the
+    residues computed so far. While a lift_cache.LiftCache is active, the last residue is
+    taken from it (or lifted from its deepest residue) and the others are reduced from it.
+
+    :param polynomial: a polynomial with integer coefficients
+    :param initial_guess: an integer initial guess provided by the user
+    :param prime: a prime p
+    :param accuracy: the number of terms desired by the user, at most
+    hnsl.max_hensel_terms(prime); None for no limit
+    :return: a generator of residues of the root mod p^(2^n)
+    """
+    if accuracy is not None:
+        hnsl.check_hensel_accuracy(prime, accuracy)
+
+    recorder = instr.ACTIVE
+    with instr.phase("compile"):
+        coefficients, slopes = integer_polynomial(polynomial)
+    guess = int(initial_guess) % prime
+    yield guess
+
+    if horner_mod(coefficients, guess, prime) != 0:
+        print(f"The initial guess {guess} is not a root mod {prime}, so it cannot be lifted.")
+        return
+
+    if lift_cache.ACTIVE is not None and accuracy is not None:
+        if horner_mod(slopes, guess, prime) != 0:
+            root = lift_cache.ACTIVE.lift(coefficients, slopes, guess, prime,
+                                          2 ** (accuracy - 1))
+            modulus = prime
+            for _ in range(accuracy - 1):
+                modulus *= modulus
+                yield root % modulus
+            return
+
+    modulus = prime
+    terms = count() if accuracy is None else range(accuracy - 1)
+    for _ in terms:
+        modulus *= modulus
+        guess = hnsl.hensel_step_mod(coefficients, slopes, guess, prime, modulus)
+        if guess is None:
             print(f"""The derivative of the next term is zero, and as such, 
                   the method will likely fail. Therefore, there are no 
                   solutions in the {prime}-adics.""")
-            return approximations
+            return
         else:
-            approximations.append(str(guess))
-        
-    return approximations
+            if recorder is not None:
+                recorder.iteration("hensel", modulus_bits=modulus.bit_length())
+            yield guess
+
+def hensel_digits(polynomial, initial_guess, prime, digits=None):
+    """
+    Given a polynomial with integer coefficients, an integer initial guess which solves
+    f(x) === 0 (mod p), a prime, and a number of digits, yield the base-p digits of the
+    p-adic root lifted from the guess, least significant first, as soon as each one is
+    known. Every lift doubles the number of known digits, and only the newly known half
+    of each residue is converted, so the digits can be written out as they arrive. If
+    digits is None, keep yielding until the consumer stops asking.
+
+    ex) For f(x) = x^2 - 2, the guess 3, and p = 7, yield 3, 1, 2, 6, 1, 2, 1, 2, ...
+
+    :param polynomial: a polynomial with integer coefficients
+    :param initial_guess: an integer initial guess provided by the user
+    :param prime: a prime p
+    :param digits: the number of digits desired by the user; None for no limit
+    :return: a generator of the p-adic digits of the root
+    """
+    known = 0
+    known_modulus = 1
+    for residue in hensel_residue_iterates(polynomial, initial_guess, prime):
+        precision = max(2 * known, 1)
+        if digits is not None:
+            precision = min(precision, digits)
+
+        yield from hnsl.residue_digits(residue // known_modulus, prime, precision - known)
+        if precision == digits:
+            return
+        known_modulus = known_modulus * known_modulus if known else prime
+        known = precision
+
+def hensel_all_roots(polynomial, prime, accuracy, exact=False):
+    """
+    Given a polynomial with integer coefficients, a prime, and an accuracy, find every root
+    of the polynomial mod p with roots_mod_p and apply Hensel's iteration to each of them.
+
+    :param polynomial: a polynomial with integer coefficients
+    :param prime: a prime p
+    :param accuracy: the number of terms desired by the user, at most
+    hnsl.max_hensel_terms(prime)
+    :param exact: boolean to specify if the guesses should be computed with sympy
+    :return: a dictionary mapping each root mod p to its sequence of guesses
+    """
+    base_roots = roots_mod_p(integer_polynomial(polynomial)[0], prime)
+    if len(base_roots) == 0:
+        print(f"There are no roots in the {prime}-adic numbers.")
+
+    return {root: hensel_roots(polynomial, root, prime, accuracy, exact) for root in base_roots}
 
 def main():
     polynomial, initial_guess, prime, accuracy = get_hensel_info()
     print(f"Congruence: {polynomial} === 0 (mod {prime}^n)\n")
-    
-    roots = hensel_roots(polynomial, initial_guess, prime, accuracy)
 
-    if len(roots) > 1:
-        print("Sequence:\n")
-        for i, root in enumerate(roots):
-            print(f"Approximation {i+1}: {root}\n")
+    if initial_guess is None:
+        sequences = hensel_all_roots(polynomial, prime, accuracy)
+    else:
+        sequences = {initial_guess: hensel_roots(polynomial, initial_guess, prime, accuracy)}
+
+    for base_root, roots in sequences.items():
+        if len(roots) > 1:
+            print(f"Sequence starting at {base_root}:\n")
+            for i, root in enumerate(roots):
+                print(f"Approximation {i+1}: {root}\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,152 @@
+import cProfile
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+ACTIVE = None
+NO_PHASE = nullcontext()
+
+class Recorder:
+    """
+    This class collects counters, per-phase timers, and per-iteration events from the
+    solvers while it is active (see recording). The solvers only check whether a recorder
+    is active, so nothing is collected or paid for otherwise.
+    """
+    def __init__(self, callback=None, record_iterations=False, profile=False):
+        """
+        :param callback: a callable called as callback(solver, values) after every
+        iteration of a solver, where values is a dictionary describing the iteration
+        :param record_iterations: boolean to specify if every iteration should be kept as
+        an event in the Chrome trace
+        :param profile: boolean to specify if cProfile should run while recording
+        """
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)
+        self.events = []
+        self.callback = callback
+        self.record_iterations = record_iterations
+        self.profiler = cProfile.Profile() if profile else None
+        self.start = time.perf_counter()
+
+    def count(self, name, amount=1):
+        """
+        Add the amount to the counter with the given name.
+
+        :param name: the name of the counter
+        :param amount: the amount to add
+        """
+        self.counters[name] += amount
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time the body of a with statement as one occurrence of the named phase.
+
+        :param name: the name of the phase
+        """
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self.timers[name] += ended - began
+            self.events.append({"name": name, "ph": "X", "pid": 0, "tid": 0,
+                                "ts": (began - self.start) * 1e6,
+                                "dur": (ended - began) * 1e6})
+
+    def iteration(self, solver, **values):
+        """
+        Record one iteration of a solver: count it, pass it to the callback, and keep it
+        as a trace event if iterations are being recorded.
+
+        :param solver: the name of the solver
+        :param values: keyword arguments describing the iteration
+        """
+        self.counters[f"{solver}_iterations"] += 1
+        if self.callback is not None:
+            self.callback(solver, values)
+        if self.record_iterations:
+            self.events.append({"name": f"{solver} iteration", "ph": "i", "s": "t",
+                                "pid": 0, "tid": 0,
+                                "ts": (time.perf_counter() - self.start) * 1e6,
+                                "args": {key: str(value) for key, value in values.items()}})
+
+    def to_dict(self):
+        """
+        Return the counters and the total seconds spent in each phase.
+
+        :return: a dictionary with "counters" and "timers" dictionaries
+        """
+        return {"counters": dict(self.counters), "timers": dict(self.timers)}
+
+    def to_chrome_trace(self):
+        """
+        Return the recorded phases, iterations, and final counters in the Chrome trace event
+        format, which chrome://tracing and Perfetto can open.
+
+        :return: a dictionary holding the list of trace events
+        """
+        counters = {"name": "counters", "ph": "C", "pid": 0, "tid": 0,
+                    "ts": (time.perf_counter() - self.start) * 1e6, "args": dict(self.counters)}
+        return {"traceEvents": self.events + [counters], "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        """
+        Write the Chrome trace of this recording to a JSON file.
+
+        :param path: the path of the file to write
+        """
+        with open(path, "w") as output:
+            json.dump(self.to_chrome_trace(), output)
+
+    def write_profile(self, path):
+        """
+        Write the cProfile statistics of this recording to a file which pstats, snakeviz,
+        and other cProfile tools can read. The recorder must have been created with
+        profile=True.
+
+        :param path: the path of the file to write
+        """
+        self.profiler.dump_stats(path)
+
+@contextmanager
+def recording(callback=None, record_iterations=False, profile=False):
+    """
+    Activate a new Recorder for the body of a with statement and return it. Recording is
+    process-wide, so it also sees solves run by other threads in the meantime.
+
+    ex) with recording() as recorder:
+            newton_root(function, 1.0, 10)
+        print(recorder.to_dict())
+
+    :param callback: a callable called as callback(solver, values) after every iteration
+    :param record_iterations: boolean to specify if every iteration should be kept as an
+    event in the Chrome trace
+    :param profile: boolean to specify if cProfile should run while recording
+    :return: the active Recorder
+    """
+    global ACTIVE
+    previous = ACTIVE
+    recorder = Recorder(callback, record_iterations, profile)
+    ACTIVE = recorder
+    if recorder.profiler is not None:
+        recorder.profiler.enable()
+    try:
+        yield recorder
+    finally:
+        if recorder.profiler is not None:
+            recorder.profiler.disable()
+        ACTIVE = previous
+
+def phase(name):
+    """
+    Return a context manager timing the named phase on the active recorder, or one which
+    does nothing if no recorder is active.
+
+    :param name: the name of the phase
+    :return: a context manager
+    """
+    if ACTIVE is None:
+        return NO_PHASE
+    return ACTIVE.phase(name)
\ No newline at end of file
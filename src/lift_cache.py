@@ -0,0 +1,232 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from hensel_helpers import hensel_extend_mod
+
+ACTIVE = None
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lifts (
+    polynomial TEXT NOT NULL,
+    prime TEXT NOT NULL,
+    root TEXT NOT NULL,
+    precision INTEGER NOT NULL,
+    residue BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (polynomial, prime, root)
+)
+"""
+
+def polynomial_key(coefficients):
+    """
+    Given the integer coefficients of a polynomial f(x) (highest degree first), return a
+    canonical string for it: the coefficients without leading zeros, negated if needed so
+    that the leading one is positive, since f and -f have the same roots.
+
+    ex) For (0, -1, 0, 2), return "1,0,-2".
+
+    :param coefficients: a sequence of int coefficients from highest degree to lowest
+    :return: a string holding the canonical coefficients
+    """
+    coefficients = list(coefficients)
+    while len(coefficients) > 1 and coefficients[0] == 0:
+        coefficients.pop(0)
+    if coefficients[0] < 0:
+        coefficients = [-coefficient for coefficient in coefficients]
+    return ",".join(str(coefficient) for coefficient in coefficients)
+
+class LiftCache:
+    """
+    This class keeps the deepest known lift of each simple root of a polynomial mod p in an
+    SQLite database, keyed by the canonical coefficients of the polynomial, the prime, and
+    the root mod p. A lift to a power no higher than the cached one is answered by reducing
+    the cached residue, and a lift to a higher power resumes from it. The least recently
+    used lifts are evicted once the residues take more than max_bytes.
+
+    The database is opened in write-ahead logging mode, so any number of processes can
+    read it while one writes. A cache inherited by a forked process opens its own
+    connection there.
+    """
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param path: the path of the database file, created if it does not exist
+        :param max_bytes: the largest total size of the cached residues, in bytes
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.statistics = {"hits": 0, "resumed": 0, "misses": 0}
+        self.pid = None
+        self.database = None
+        self.inherited = []
+
+    def connection(self):
+        """
+        Return the connection of this process to the database, opening it (and evicting
+        lifts beyond max_bytes) if needed.
+
+        :return: an sqlite3.Connection
+        """
+        if self.pid != os.getpid():
+            # A connection inherited from the parent of a forked process must be neither
+            # used nor closed in the child, so it is only kept from being collected.
+            if self.database is not None:
+                self.inherited.append(self.database)
+            self.database = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self.database.execute("PRAGMA journal_mode=WAL")
+            self.database.execute(SCHEMA)
+            self.pid = os.getpid()
+            with self.database:
+                self.database.execute("BEGIN IMMEDIATE")
+                self.evict(self.database)
+        return self.database
+
+    def close(self):
+        """
+        Close the connection of this process to the database.
+        """
+        if self.database is not None and self.pid == os.getpid():
+            self.database.close()
+        self.database = None
+        self.pid = None
+
+    def get(self, polynomial, prime, root):
+        """
+        Return the deepest cached lift of a root mod p, or None if there is none.
+
+        :param polynomial: the canonical coefficients of the polynomial from polynomial_key
+        :param prime: a prime p
+        :param root: a simple root of the polynomial mod p
+        :return: a tuple of the precision n and the residue of the lift mod p^n; None if the
+        root has no cached lift
+        """
+        database = self.connection()
+        row = database.execute(
+            "SELECT precision, residue FROM lifts WHERE polynomial = ? AND prime = ? AND root = ?",
+            (polynomial, str(prime), str(root))).fetchone()
+        if row is None:
+            return None
+
+        try:
+            database.execute("UPDATE lifts SET used = ? WHERE polynomial = ? AND prime = ? "
+                             "AND root = ?", (time.time(), polynomial, str(prime), str(root)))
+        except sqlite3.OperationalError:
+            pass
+        return row[0], int.from_bytes(row[1], "little")
+
+    def put(self, polynomial, prime, root, precision, residue):
+        """
+        Store the lift of a root mod p to the given precision, unless a deeper lift of it
+        is already stored, then evict the least recently used lifts beyond max_bytes.
+
+        :param polynomial: the canonical coefficients of the polynomial from polynomial_key
+        :param prime: a prime p
+        :param root: a simple root of the polynomial mod p
+        :param precision: the power n of p the residue is known to
+        :param residue: the residue of the lift mod p^n
+        """
+        data = residue.to_bytes((residue.bit_length() + 7) // 8, "little")
+        database = self.connection()
+        with database:
+            database.execute("BEGIN IMMEDIATE")
+            database.execute(
+                "INSERT INTO lifts VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (polynomial, prime, root) DO UPDATE SET precision = "
+                "excluded.precision, residue = excluded.residue, size = excluded.size, "
+                "used = excluded.used WHERE excluded.precision > lifts.precision",
+                (polynomial, str(prime), str(root), precision, data, len(data), time.time()))
+            self.evict(database)
+
+    def evict(self, database):
+        """
+        Delete the least recently used lifts until the stored residues take at most
+        max_bytes.
+
+        :param database: the connection to delete through, inside a transaction
+        """
+        excess = database.execute("SELECT TOTAL(size) FROM lifts").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for rowid, size in database.execute("SELECT rowid, size FROM lifts ORDER BY used"):
+            victims.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        database.executemany("DELETE FROM lifts WHERE rowid = ?", victims)
+
+    def lift(self, coefficients, slopes, root, prime, power):
+        """
+        Given the integer coefficients of f(x) and f'(x), a simple root of f mod p, a prime
+        p, and a power n, return the lift of the root to a root of f mod p^n, answering from
+        the cache where it can and storing any deeper lift it computes.
+
+        :param coefficients: a list of int coefficients of f from highest degree to lowest
+        :param slopes: a list of int coefficients of f' from highest degree to lowest
+        :param root: a simple root of f mod p
+        :param prime: a prime number p
+        :param power: the power of the modulus to lift the root to
+        :return: the lifted root in [0, p^n)
+        """
+        polynomial = polynomial_key(coefficients)
+        root %= prime
+        cached = self.get(polynomial, prime, root)
+
+        if cached is not None and cached[0] >= power:
+            self.statistics["hits"] += 1
+            return cached[1] % pow(prime, power)
+
+        if cached is not None:
+            self.statistics["resumed"] += 1
+            precision, residue = cached
+        else:
+            self.statistics["misses"] += 1
+            precision, residue = 1, root
+
+        residue = hensel_extend_mod(coefficients, slopes, residue, prime, precision, power)
+        if residue is not None:
+            self.put(polynomial, prime, root, power, residue)
+        return residue
+
+def lift_simple_root(coefficients, slopes, root, prime, power):
+    """
+    Given the integer coefficients of f(x) and f'(x), a simple root of f mod p, a prime p,
+    and a power n, return the lift of the root to a root of f mod p^n, through the active
+    LiftCache if there is one.
+
+    :param coefficients: a list of int coefficients of f from highest degree to lowest
+    :param slopes: a list of int coefficients of f' from highest degree to lowest
+    :param root: a simple root of f mod p
+    :param prime: a prime number p
+    :param power: the power of the modulus to lift the root to
+    :return: the lifted root in [0, p^n) if defined; else None
+    """
+    if ACTIVE is None:
+        return hensel_extend_mod(coefficients, slopes, root % prime, prime, 1, power)
+    return ACTIVE.lift(coefficients, slopes, root, prime, power)
+
+@contextmanager
+def caching(path, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Activate a LiftCache stored at the given path for the body of a with statement and
+    return it. While it is active, the lifts of simple roots made by the congruence and
+    Hensel solvers go through it.
+
+    ex) with caching("lifts.sqlite"):
+            congruence_roots(polynomial, 7, 1000)
+
+    :param path: the path of the database file
+    :param max_bytes: the largest total size of the cached residues, in bytes
+    :return: the active LiftCache
+    """
+    global ACTIVE
+    previous = ACTIVE
+    ACTIVE = LiftCache(path, max_bytes)
+    try:
+        yield ACTIVE
+    finally:
+        ACTIVE.close()
+        ACTIVE = previous
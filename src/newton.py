@@ -1,38 +1,430 @@
+import numpy as np
 from terminal_ui import get_newton_info
 import newton_helpers as nwtn
+import instrumentation as instr
+from expression_cache import compile_function
+from polynomial_helpers import coefficient_list
+from newton_helpers import Status
 
-def newton_root(function, guess, accuracy):
+FLOAT_DIGITS = 15
+START_BITS = 64
+EVALUATION_ERRORS = (ValueError, ZeroDivisionError, OverflowError)
+
+def newton_root(function, guess, accuracy, exact=False, abs_tol=None, rel_tol=0.0,
+                residual_tol=0.0, max_iter=100, high_precision=None):
     """
     Given a function, initial guess, and accuracy (in terms of number of decimal
     places), return the list of guesses by Newton's method. If at any point in
     the iterative process, the derivative becomes zero, then return the guesses 
     computed so far and deem that reaching the root isn't possible.
 
+    See newton_iterates for the stopping criteria and the remaining parameters.
+
     :param function: a real-valued function
     :param guess: the initial guess given by the user
     :param accuracy: the number of accurate decimal places given by the user
+    :param exact: boolean to specify if the guesses should be computed with sympy
     :return: a list of consecutive guesses computed by Newton's method
     """
-    approximations = [guess]
-    refining_our_guess = True
-
-    while refining_our_guess:
-        previous_guess = guess
-        guess = nwtn.newton_new_guess(function, previous_guess)
+    approximations, status = newton_solve(function, guess, accuracy, exact, abs_tol,
+                                          rel_tol, residual_tol, max_iter, high_precision)
 
-        if not guess:
-            print("\nSince the derivative value at the initial guess is zero, " \
-            "the existence of a root is not guaranteed.")
-            return approximations
-        else:
-            approximations.append(guess)
-        
-        agreed_places = nwtn.number_of_common_decimal_places(guess, previous_guess)
-        if agreed_places >= accuracy:
-            refining_our_guess = False
+    if status == Status.ZERO_DERIVATIVE:
+        print("\nSince the derivative value at the initial guess is zero, " \
+        "the existence of a root is not guaranteed.")
+    elif status == Status.MAX_ITERATIONS:
+        print(f"\nNewton's method did not converge within {max_iter} iterations.")
+    elif status == Status.DIVERGED:
+        print("\nNewton's method left the domain of the function or diverged.")
 
     return approximations
 
+def newton_solve(function, guess, accuracy, exact=False, abs_tol=None, rel_tol=0.0,
+                 residual_tol=0.0, max_iter=100, high_precision=None):
+    """
+    Given a function, initial guess, and accuracy (in terms of number of decimal places),
+    run Newton's method and return the list of guesses together with the reason it stopped.
+    This collects the guesses yielded by newton_iterates, which describes the parameters.
+
+    :param function: a real-valued function
+    :param guess: the initial guess given by the user
+    :param accuracy: the number of accurate decimal places given by the user
+    :return: a tuple containing the list of consecutive guesses and the Status it stopped with
+    """
+    return nwtn.collect(newton_iterates(function, guess, accuracy, exact, abs_tol, rel_tol,
+                                        residual_tol, max_iter, high_precision))
+
+def newton_iterates(function, guess, accuracy, exact=False, abs_tol=None, rel_tol=0.0,
+                    residual_tol=0.0, max_iter=100, high_precision=None):
+    """
+    Given a function, initial guess, and accuracy (in terms of number of decimal places),
+    run Newton's method and yield the initial guess and then every new guess as soon as it
+    is computed. The generator returns the Status it stopped with, which is the value of
+    its StopIteration (or of a yield from expression). Only the current guess is kept, so
+    a consumer which writes each guess out as it arrives needs constant memory per step.
+
+    The iteration stops with Status.RESIDUAL_TOLERANCE as soon as |f(x_n)| <= residual_tol,
+    and with Status.STEP_TOLERANCE once a step satisfies |x_{n+1} - x_n| <= abs_tol +
+    rel_tol * |x_{n+1}|. If abs_tol is not given, it is derived from the accuracy. It stops
+    with Status.ZERO_DERIVATIVE if f'(x_n) is zero, with Status.DIVERGED if f or f' cannot
+    be evaluated at x_n (such as log(x) at a negative guess, or 1/x at 0), and with
+    Status.MAX_ITERATIONS after max_iter steps. Each step evaluates f and f' exactly once.
+
+    The function and its derivative are compiled once before iterating. Pass
+    exact=True to evaluate through sympy instead and obtain sympy results. Accuracies
+    beyond what a float holds are computed in arbitrary precision by
+    newton_iterates_high_precision, unless high_precision is given explicitly.
+
+    :param function: a real-valued function
+    :param guess: the initial guess given by the user
+    :param accuracy: the number of accurate decimal places given by the user
+    :param exact: boolean to specify if the guesses should be computed with sympy
+    :param abs_tol: the absolute tolerance on the step; None to derive it from accuracy
+    :param rel_tol: the tolerance on the step relative to the current guess
+    :param residual_tol: the tolerance on |f(x_n)|
+    :param max_iter: the largest number of steps to take
+    :param high_precision: boolean to specify if the guesses should be computed in
+    arbitrary precision; None to decide from the accuracy
+    :return: a generator of consecutive guesses which returns the Status it stopped with
+    """
+    if high_precision is None:
+        high_precision = not exact and accuracy > FLOAT_DIGITS
+    if high_precision:
+        return (yield from newton_iterates_high_precision(function, guess, accuracy, abs_tol,
+                                                          rel_tol, residual_tol, max_iter))
+
+    if abs_tol is None:
+        abs_tol = nwtn.accuracy_tolerance(accuracy)
+
+    recorder = instr.ACTIVE
+    with instr.phase("compile"):
+        evaluate, derivative = compile_function(function, exact)
+    yield guess
+
+    with instr.phase("iterate"):
+        for _ in range(max_iter):
+            try:
+                value = evaluate(guess)
+            except EVALUATION_ERRORS:
+                return Status.DIVERGED
+            if recorder is not None:
+                recorder.count("function_evaluations")
+            if abs(value) <= residual_tol:
+                return Status.RESIDUAL_TOLERANCE
+
+            try:
+                slope = derivative(guess)
+            except EVALUATION_ERRORS:
+                return Status.DIVERGED
+            if recorder is not None:
+                recorder.count("derivative_evaluations")
+            if slope == 0:
+                return Status.ZERO_DERIVATIVE
+
+            step = value / slope
+            guess = guess - step
+            if recorder is not None:
+                recorder.iteration("newton", guess=guess, step=step)
+            yield guess
+
+            if nwtn.within_tolerance(step, guess, abs_tol, rel_tol):
+                return Status.STEP_TOLERANCE
+
+        return Status.MAX_ITERATIONS
+
+def newton_solve_high_precision(function, guess, accuracy, abs_tol=None, rel_tol=0.0,
+                                residual_tol=0.0, max_iter=100):
+    """
+    Given a function, initial guess, and accuracy (in terms of number of decimal places),
+    run Newton's method in arbitrary precision and return the list of guesses (as mpmath
+    numbers) together with the Status it stopped with. This collects the guesses yielded
+    by newton_iterates_high_precision, which describes the parameters.
+
+    :param function: a real-valued function
+    :param guess: the initial guess given by the user
+    :param accuracy: the number of accurate decimal places given by the user
+    :return: a tuple containing the list of consecutive guesses and the Status it stopped with
+    """
+    return nwtn.collect(newton_iterates_high_precision(function, guess, accuracy, abs_tol,
+                                                       rel_tol, residual_tol, max_iter))
+
+def newton_iterates_high_precision(function, guess, accuracy, abs_tol=None, rel_tol=0.0,
+                                   residual_tol=0.0, max_iter=100):
+    """
+    Given a function, initial guess, and accuracy (in terms of number of decimal places),
+    run Newton's method in arbitrary precision with mpmath (which uses gmpy2 when it is
+    installed), yield the initial guess and then every new guess as soon as it is computed,
+    and return the Status it stopped with.
+
+    The guess is first refined at machine precision. Since every step then doubles the
+    number of correct digits, each following step runs at twice the precision of the one
+    before, up to the target, so the whole solve costs about as much as its last step.
+    Within a step only f(x_n) needs the full working precision; the derivative and the
+    quotient are computed at half of it. The stopping criteria are those of newton_iterates.
+
+    :param function: a real-valued function
+    :param guess: the initial guess given by the user
+    :param accuracy: the number of accurate decimal places given by the user
+    :param abs_tol: the absolute tolerance on the step; None to derive it from accuracy
+    :param rel_tol: the tolerance on the step relative to the current guess
+    :param residual_tol: the tolerance on |f(x_n)|
+    :param max_iter: the largest number of steps to take
+    :return: a generator of consecutive guesses (as mpmath numbers) which returns the
+    Status it stopped with
+    """
+    from mpmath import mpf, mpmathify, workprec
+    recorder = instr.ACTIVE
+    with instr.phase("compile"):
+        evaluate, derivative = compile_function(function, multiprecision=True)
+    target_bits = nwtn.digits_to_bits(accuracy)
+    schedule = [START_BITS] + nwtn.precision_schedule(target_bits, START_BITS)
+
+    with workprec(target_bits):
+        if abs_tol is None:
+            abs_tol = mpf(5) / mpf(10) ** (accuracy + 1)
+        abs_tol, rel_tol, residual_tol = mpf(abs_tol), mpf(rel_tol), mpf(residual_tol)
+        start_tol = mpf(2) ** (START_BITS // 2 - START_BITS)
+
+    yield guess
+    steps_taken = 0
+
+    with instr.phase("iterate"):
+        while steps_taken < max_iter:
+            if schedule:
+                bits = schedule[0]
+            else:
+                bits = target_bits
+
+            with workprec(bits):
+                guess = +mpmathify(guess)
+                try:
+                    value = evaluate(guess)
+                except EVALUATION_ERRORS:
+                    return Status.DIVERGED
+                if recorder is not None:
+                    recorder.count("function_evaluations")
+                if abs(value) <= residual_tol:
+                    return Status.RESIDUAL_TOLERANCE
+
+            with workprec(bits // 2 + 16):
+                try:
+                    slope = derivative(guess)
+                except EVALUATION_ERRORS:
+                    return Status.DIVERGED
+                if recorder is not None:
+                    recorder.count("derivative_evaluations")
+                if slope == 0:
+                    return Status.ZERO_DERIVATIVE
+                step = value / slope
+
+            with workprec(bits):
+                guess = guess - step
+            steps_taken += 1
+            if recorder is not None:
+                recorder.iteration("newton", precision=bits, step=step)
+            yield guess
+
+            if schedule:
+                if bits > START_BITS or abs(step) <= start_tol * abs(guess):
+                    schedule = schedule[1:]
+            elif nwtn.within_tolerance(step, guess, abs_tol, rel_tol):
+                return Status.STEP_TOLERANCE
+
+        return Status.MAX_ITERATIONS
+
+def newton_roots_batch(function, guesses, tol=1e-12, max_iter=100, rel_tol=0.0,
+                       residual_tol=0.0):
+    """
+    Given a function and an array of initial guesses, run Newton's method on every guess
+    at once. The function and its derivative are compiled once into NumPy callables and
+    each iteration evaluates them over all guesses still in progress; guesses that have
+    converged, hit a zero derivative, or stopped being finite are masked out of later
+    iterations. Complex guesses are iterated over the complex plane, as for Newton fractals.
+
+    The stopping criteria are those of newton_iterates, with tol as the absolute tolerance on
+    the step, and the status array records which one each guess stopped with.
+
+    :param function: a real- or complex-valued function
+    :param guesses: an array-like of real or complex initial guesses, of any shape
+    :param tol: the absolute tolerance on the step
+    :param max_iter: the largest number of iterations to run for any guess
+    :param rel_tol: the tolerance on the step relative to the current guess
+    :param residual_tol: the tolerance on |f(x_n)|
+    :return: a tuple of three arrays shaped like guesses, holding the final guesses, the
+    number of iterations taken, and the Status code of each guess
+    """
+    recorder = instr.ACTIVE
+    with instr.phase("compile"):
+        evaluate, derivative = compile_function(function, vectorized=True)
+
+    roots = np.array(guesses)
+    if not np.issubdtype(roots.dtype, np.inexact):
+        roots = roots.astype(np.float64)
+    iterations = np.zeros(roots.shape, dtype=np.int64)
+    status = np.full(roots.shape, Status.MAX_ITERATIONS, dtype=np.int8)
+
+    flat_roots = roots.reshape(-1)
+    flat_iterations = iterations.reshape(-1)
+    flat_status = status.reshape(-1)
+    active = np.arange(flat_roots.size)
+
+    with np.errstate(all="ignore"), instr.phase("iterate"):
+        for iteration in range(1, max_iter + 1):
+            if active.size == 0:
+                break
+
+            guess = flat_roots[active]
+            values = np.broadcast_to(evaluate(guess), guess.shape)
+            if recorder is not None:
+                recorder.count("function_evaluations", guess.size)
+            solved = np.abs(values) <= residual_tol
+            flat_status[active[solved]] = Status.RESIDUAL_TOLERANCE
+
+            moving = ~solved
+            active, guess, values = active[moving], guess[moving], values[moving]
+            slopes = np.broadcast_to(derivative(guess), guess.shape)
+            if recorder is not None:
+                recorder.count("derivative_evaluations", guess.size)
+            zero = slopes == 0
+            flat_status[active[zero]] = Status.ZERO_DERIVATIVE
+
+            moving = ~zero
+            active, guess, values = active[moving], guess[moving], values[moving]
+            steps = values / slopes[moving]
+            guess = guess - steps
+            flat_roots[active] = guess
+            flat_iterations[active] = iteration
+
+            finite = np.isfinite(steps)
+            flat_status[active[~finite]] = Status.DIVERGED
+            converged = finite & (np.abs(steps) <= tol + rel_tol * np.abs(guess))
+            flat_status[active[converged]] = Status.STEP_TOLERANCE
+            active = active[finite & ~converged]
+            if recorder is not None:
+                recorder.iteration("batch", iteration=iteration, active=active.size)
+
+    return roots, iterations, status
+
+def complex_coefficients(coefficients):
+    """
+    Given the coefficients of a polynomial, return them as a NumPy array of complex numbers.
+    Rational coefficients (or real and imaginary parts) too large for a float are all
+    divided by the same power of 2 first, exactly, which leaves the roots unchanged; a
+    ValueError is raised if the smallest nonzero ones would then vanish.
+
+    :param coefficients: a list of coefficients from highest degree to lowest
+    :return: a NumPy array of complex coefficients with the same roots
+    """
+    try:
+        converted = np.array([complex(c) for c in coefficients])
+        if np.all(np.isfinite(converted)):
+            return converted
+    except OverflowError:
+        pass
+
+    from fractions import Fraction
+    parts = []
+    try:
+        for c in coefficients:
+            real, imaginary = (c, 0) if isinstance(c, int) else c.as_real_imag()
+            parts.append((Fraction(str(real)), Fraction(str(imaginary))))
+    except ValueError:
+        raise ValueError("The coefficients are too large for floating point")
+
+    largest = max(max(abs(real), abs(imaginary)) for real, imaginary in parts)
+    shift = largest.numerator.bit_length() - largest.denominator.bit_length() - 1000
+    scale = Fraction(2) ** shift
+    scaled = [complex(float(real / scale), float(imaginary / scale))
+              for real, imaginary in parts]
+    if any((real or imaginary) and not value for (real, imaginary), value in zip(parts, scaled)):
+        raise ValueError("The coefficients span too wide a range for floating point")
+    return np.array(scaled)
+
+def polynomial_roots(polynomial, tol=1e-12, max_iter=100, rel_tol=0.0):
+    """
+    Given a polynomial of degree d with real or complex coefficients, find all d of its
+    complex roots at once by the Aberth-Ehrlich iteration, in which every approximation
+    z_i takes the Newton step of f(x) / prod_{j != i} (x - z_j), so that the approximations
+    repel one another instead of converging to the same root. Each iteration updates every
+    root still in progress with a few NumPy operations over all of them, and costs O(d^2).
+    The starting points come from nwtn.initial_approximations.
+
+    A root stops with Status.RESIDUAL_TOLERANCE once |f(z_i)| is within the rounding error
+    of evaluating f there, with Status.STEP_TOLERANCE once its step is within tol +
+    rel_tol * |z_i|, with Status.DIVERGED if its step stops being finite, and otherwise with
+    Status.MAX_ITERATIONS. A diverged root keeps its last approximation instead of being
+    moved by a zero step, so that it cannot pass for converged. Roots of multiplicity m are
+    only found to about 1/m of the digits of simple roots, as with any method working in
+    floats.
+
+    The error bound of each root is the radius d * |f(z_i)| / |f'(z_i)| of a disk around it
+    which contains a root of f, with |f(z_i)| increased by its rounding error.
+
+    :param polynomial: a polynomial in x with real or complex coefficients
+    :param tol: the absolute tolerance on the step
+    :param max_iter: the largest number of iterations to run
+    :param rel_tol: the tolerance on the step relative to the current root
+    :return: a tuple of three arrays holding the d roots, sorted by real and then imaginary
+    part, their error bounds, and the Status code of each root
+    """
+    recorder = instr.ACTIVE
+    with instr.phase("compile"):
+        coefficients = coefficient_list(polynomial)
+        if coefficients is None:
+            raise ValueError("Not a polynomial")
+        coefficients = np.trim_zeros(complex_coefficients(coefficients), "f")
+
+    if coefficients.size == 0:
+        raise ValueError("The zero polynomial has no finite set of roots")
+    nonzero = np.trim_zeros(coefficients, "b")
+    zero_roots = coefficients.size - nonzero.size
+    coefficients = nonzero
+
+    degree = coefficients.size - 1
+    magnitudes = np.abs(coefficients)
+    rounding = 2 * max(degree, 1) * np.finfo(float).eps
+    roots = nwtn.initial_approximations(coefficients) if degree else np.zeros(0, dtype=complex)
+    status = np.full(degree, Status.MAX_ITERATIONS, dtype=np.int8)
+    active = np.arange(degree)
+
+    with np.errstate(all="ignore"), instr.phase("iterate"):
+        for iteration in range(1, max_iter + 1):
+            if active.size == 0:
+                break
+
+            ratios, residuals, _ = nwtn.log_derivative(coefficients, magnitudes, roots[active])
+            if recorder is not None:
+                recorder.count("function_evaluations", active.size)
+                recorder.count("derivative_evaluations", active.size)
+            solved = residuals <= rounding
+            status[active[solved]] = Status.RESIDUAL_TOLERANCE
+            active, ratios = active[~solved], ratios[~solved]
+
+            differences = roots[active, None] - roots[None, :]
+            differences[np.arange(active.size), active] = np.inf
+            steps = 1 / (ratios - (1 / differences).sum(axis=1))
+            diverged = ~np.isfinite(steps)
+            status[active[diverged]] = Status.DIVERGED
+            active, steps = active[~diverged], steps[~diverged]
+            roots[active] -= steps
+
+            converged = np.abs(steps) <= tol + rel_tol * np.abs(roots[active])
+            status[active[converged]] = Status.STEP_TOLERANCE
+            active = active[~converged]
+            if recorder is not None:
+                recorder.iteration("aberth", iteration=iteration, active=active.size)
+
+    with np.errstate(all="ignore"):
+        _, residuals, slopes = nwtn.log_derivative(coefficients, magnitudes, roots)
+        bounds = degree * (residuals + rounding) / slopes
+
+    roots = np.concatenate([roots, np.zeros(zero_roots, dtype=complex)])
+    bounds = np.concatenate([bounds, np.zeros(zero_roots)])
+    status = np.concatenate([status, np.full(zero_roots, Status.RESIDUAL_TOLERANCE,
+                                             dtype=np.int8)])
+    order = np.lexsort((roots.imag, roots.real))
+    return roots[order], bounds[order], status[order]
+
 def main():
     function, guess, accuracy = get_newton_info()
     sequence_of_guesses = newton_root(function, guess, accuracy)
@@ -1,5 +1,17 @@
-from sympy import diff
-from sympy.abc import x
+from enum import IntEnum
+import numpy as np
+from expression_cache import derivative_expression
+
+class Status(IntEnum):
+    """
+    This class holds the reasons Newton's method can stop iterating. The first two mean
+    the iteration converged, and say which criterion was met.
+    """
+    STEP_TOLERANCE = 0
+    RESIDUAL_TOLERANCE = 1
+    ZERO_DERIVATIVE = 2
+    MAX_ITERATIONS = 3
+    DIVERGED = 4
 
 def function_value(function, value):
     """
@@ -9,43 +21,146 @@ def function_value(function, value):
     :param value: an input x value
     :return: the function's value at that input or f(x)
     """
+    from sympy.abc import x
     return function.subs(x, value)
 
-def count_decimal_places(number):
+def accuracy_tolerance(accuracy):
+    """
+    Given an accuracy as a number of decimal places, return the absolute tolerance on the
+    Newton step which guarantees it: half a unit in the last requested place.
+
+    :param accuracy: the number of accurate decimal places
+    :return: the absolute step tolerance 0.5 * 10^(-accuracy)
+    """
+    return 0.5 * 10.0 ** -accuracy
+
+def within_tolerance(step, guess, abs_tol, rel_tol):
+    """
+    Return true if a Newton step is small enough to stop iterating, that is, if
+
+    |step| <= abs_tol + rel_tol * |guess|.
+
+    :param step: the size of the last Newton step f(x_n)/f'(x_n)
+    :param guess: the guess x_{n+1} reached by that step
+    :param abs_tol: the absolute tolerance on the step
+    :param rel_tol: the tolerance on the step relative to the guess
+    :return: true if the step is within the tolerance; false otherwise
+    """
+    return abs(step) <= abs_tol + rel_tol * abs(guess)
+
+def digits_to_bits(digits):
+    """
+    Given a number of decimal digits, return the number of bits of binary precision
+    needed to hold them, plus a few guard bits against rounding.
+
+    :param digits: a number of decimal digits
+    :return: a number of bits
     """
-    Given a number, return the number of decimal places it has, or 0 if none.
+    return int(digits * 3.3219280948873626) + 16
 
-    :param number: a real number
-    :return: the number of decimal places in number
+def precision_schedule(target_bits, start_bits):
     """
-    s = str(number)
-    if '.' in s:
-        return len(s[s.index('.') + 1 : len(s)])
-    return 0
+    Given a target precision and the precision a guess is already accurate to (both in
+    bits), return the increasing list of working precisions for Newton's method to step
+    through. Each step roughly doubles the correct bits of the guess, so each precision is
+    about twice the one before it and the list ends at the target.
 
-def number_of_common_decimal_places(num_1, num_2):
+    ex) For a target of 1000 bits starting from 64 bits, return [70, 132, 256, 504, 1000].
+
+    :param target_bits: the precision of the final guess
+    :param start_bits: the precision the starting guess is accurate to
+    :return: a list of precisions in bits, in increasing order
+    """
+    schedule = []
+    bits = target_bits
+    while bits > start_bits:
+        schedule.append(bits)
+        bits = bits // 2 + 4
+    return schedule[::-1]
+
+def initial_approximations(coefficients):
+    """
+    Given the complex coefficients of a polynomial f(x) of degree d (highest degree first)
+    with nonzero leading and constant terms, return d starting points for simultaneous
+    iteration on all of its roots. The points are spread over circles whose radii come
+    from the upper convex hull of the points (i, log|c_i|), where c_i is the coefficient of
+    x^i (the Newton polygon), so that roots of very different sizes each get starting
+    points near their own size.
+
+    :param coefficients: a NumPy array of complex coefficients from highest degree to lowest
+    :return: a NumPy array of d complex starting points
+    """
+    degree = len(coefficients) - 1
+    with np.errstate(divide="ignore"):
+        logs = np.log(np.abs(coefficients[::-1]))
+
+    hull = []
+    for power in range(degree + 1):
+        if not np.isfinite(logs[power]):
+            continue
+        while len(hull) >= 2:
+            first, second = hull[-2], hull[-1]
+            turn = ((second - first) * (logs[power] - logs[first])
+                    - (logs[second] - logs[first]) * (power - first))
+            if turn < 0:
+                break
+            hull.pop()
+        hull.append(power)
+
+    points = []
+    for segment, (low, high) in enumerate(zip(hull, hull[1:])):
+        count = high - low
+        radius = np.exp((logs[low] - logs[high]) / count)
+        angles = (2 * np.pi * np.arange(count) / count
+                  + 2 * np.pi * segment / degree + 0.7)
+        points.append(radius * np.exp(1j * angles))
+    return np.concatenate(points)
+
+def log_derivative(coefficients, magnitudes, roots):
     """
-    Given two numbers, return the number of decimal places that they share in common.
+    Given the complex coefficients of a polynomial f(x) of degree d (highest degree first),
+    the absolute values of those coefficients, and an array of points z, return f'(z)/f(z)
+    together with |f(z)| and |f'(z)| both divided by s(|z|), where s is the polynomial
+    with the absolute values as coefficients. Dividing by s(|z|) makes |f(z)| comparable
+    to the rounding error of evaluating it, which is about 2d machine epsilons of s(|z|).
 
-    :param num_1: a real number
-    :param num_2: a real number
-    :return: an integer number of decimal places shared between num_1 and num_2
+    Points inside the unit circle are evaluated by Horner's scheme, and points outside it
+    through the reversed polynomial in 1/z, so that no power of z overflows even for
+    polynomials of high degree.
+
+    :param coefficients: a NumPy array of complex coefficients from highest degree to lowest
+    :param magnitudes: a NumPy array of the absolute values of the coefficients
+    :param roots: a NumPy array of complex points
+    :return: a tuple of three arrays holding f'(z)/f(z), |f(z)|/s(|z|), and |f'(z)|/s(|z|)
     """
-    num_1 = str(num_1)
-    num_2 = str(num_2)
+    degree = len(coefficients) - 1
+    outside = np.abs(roots) > 1
+    points = np.where(outside, 1 / roots, roots)
+    sizes = np.abs(points)
 
-    num_1_decimals = num_1[num_1.index('.') + 1 : len(num_1)]
-    num_2_decimals = num_2[num_2.index('.') + 1 : len(num_2)]
+    value = np.zeros(roots.shape, dtype=complex)
+    slope = np.zeros(roots.shape, dtype=complex)
+    scale = np.zeros(roots.shape)
+    reversed_value = np.zeros(roots.shape, dtype=complex)
+    reversed_slope = np.zeros(roots.shape, dtype=complex)
+    reversed_scale = np.zeros(roots.shape)
+    for coefficient, reversed_coefficient, magnitude, reversed_magnitude in zip(
+            coefficients, coefficients[::-1], magnitudes, magnitudes[::-1]):
+        slope = slope * points + value
+        value = value * points + coefficient
+        scale = scale * sizes + magnitude
+        reversed_slope = reversed_slope * points + reversed_value
+        reversed_value = reversed_value * points + reversed_coefficient
+        reversed_scale = reversed_scale * sizes + reversed_magnitude
 
-    count = 0
-    for i in range(len(num_1_decimals)):
-        if i < len(num_2_decimals):
-            if num_1_decimals[i] == num_2_decimals[i]:
-                count += 1
-        else:
-            break
+    # For |z| > 1 with w = 1/z and g(w) = w^d f(1/w), f'(z)/f(z) = (d g(w) - w g'(w)) w / g(w).
+    outer_slope = degree * reversed_value - points * reversed_slope
+    slope = np.where(outside, outer_slope * points, slope)
+    value = np.where(outside, reversed_value, value)
+    scale = np.where(outside, reversed_scale, scale)
 
-    return count
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return slope / value, np.abs(value) / scale, np.abs(slope) / scale
 
 def newton_new_guess(function, old_guess):
     """
@@ -64,7 +179,7 @@ def newton_new_guess(function, old_guess):
         return None
     
     numerator = function_value(function, old_guess)
-    denominator = function_value(diff(function, x), old_guess)
+    denominator = function_value(derivative_expression(function), old_guess)
     return old_guess - numerator / denominator
 
 def newton_derivative_is_zero(function, value):
@@ -76,5 +191,20 @@ def newton_derivative_is_zero(function, value):
     :param value: a given input x value
     :return: true if f'(x) == 0; false if f'(x) != 0
     """
-    derivative_function = diff(function, x)
-    return function_value(derivative_function, value) == 0
\ No newline at end of file
+    derivative_function = derivative_expression(function)
+    return function_value(derivative_function, value) == 0
+
+def collect(iterates):
+    """
+    Given a generator of guesses which returns the Status it stopped with, such as
+    newton.newton_iterates, run it to the end and return what it produced.
+
+    :param iterates: a generator of consecutive guesses
+    :return: a tuple containing the list of guesses and the Status it stopped with
+    """
+    approximations = []
+    while True:
+        try:
+            approximations.append(next(iterates))
+        except StopIteration as stop:
+            return approximations, stop.value
@@ -0,0 +1,292 @@
+import warnings
+import numpy as np
+from terminal_ui import get_system_info
+import newton_helpers as nwtn
+import instrumentation as instr
+from expression_cache import compile_system
+from newton_helpers import Status
+
+JACOBIAN_MODES = ("newton", "reuse", "broyden")
+STALL_RATIO = 0.5
+
+class LinearStep:
+    """
+    This class solves the linear systems J s = b and J^T s = b for one Jacobian J of a
+    Newton iteration. A dense Jacobian is solved by LAPACK through NumPy if it is used only
+    once. Otherwise it is LU factored once by SciPy's lu_factor, so that every later solve
+    costs two triangular solves, or inverted once by NumPy if SciPy is not installed. A
+    sparse Jacobian (given as row indices, column indices, and values) is factored once by
+    SuperLU if SciPy is installed, and otherwise assembled into a dense array and treated
+    as above.
+    """
+    def __init__(self, jacobian, size, reused=False):
+        """
+        :param jacobian: an n by n array, or a tuple of the row indices, column indices,
+        and values of a sparse n by n matrix
+        :param size: the number of unknowns n
+        :param reused: boolean to specify if the Jacobian will be solved with more than once
+        """
+        self.factor = None
+        self.lu = None
+        self.inverse = None
+        self.matrix = None
+
+        if isinstance(jacobian, tuple):
+            rows, columns, values = jacobian
+            try:
+                from scipy.sparse import csc_matrix
+                from scipy.sparse.linalg import splu
+            except ImportError:
+                matrix = np.zeros((size, size))
+                np.add.at(matrix, (rows, columns), values)
+                jacobian = matrix
+            else:
+                try:
+                    self.factor = splu(csc_matrix((values, (rows, columns)), shape=(size, size)))
+                except RuntimeError as error:
+                    raise np.linalg.LinAlgError(str(error))
+                return
+
+        if not reused:
+            self.matrix = jacobian
+            return
+
+        try:
+            from scipy.linalg import LinAlgWarning, lu_factor
+        except ImportError:
+            self.inverse = np.linalg.inv(jacobian)
+            return
+
+        # lu_factor only warns about an exactly singular matrix, so a zero pivot is turned
+        # into the LinAlgError np.linalg.inv would have raised.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LinAlgWarning)
+            self.lu = lu_factor(jacobian, check_finite=False)
+        if not np.all(np.diagonal(self.lu[0])):
+            raise np.linalg.LinAlgError("Singular matrix")
+
+    def solve(self, vector, transposed=False):
+        """
+        Return the solution s of J s = b, or of J^T s = b if transposed is true.
+
+        :param vector: the right-hand side b
+        :param transposed: boolean to specify if the transposed system should be solved
+        :return: the solution as a NumPy vector
+        """
+        if self.factor is not None:
+            return self.factor.solve(vector, trans="T" if transposed else "N")
+        if self.lu is not None:
+            from scipy.linalg import lu_solve
+            return lu_solve(self.lu, vector, trans=1 if transposed else 0, check_finite=False)
+        if self.inverse is not None:
+            return (self.inverse.T if transposed else self.inverse) @ vector
+        return np.linalg.solve(self.matrix.T if transposed else self.matrix, vector)
+
+class BroydenInverse:
+    """
+    This class applies the inverse H of a Jacobian approximation kept up to date by
+    Broyden's ("good") method, starting from the factored Jacobian J_0 of a LinearStep.
+    Every update
+
+    H_{k+1} = H_k + (s_k - H_k y_k)(s_k^T H_k) / (s_k^T H_k y_k)
+
+    is stored as the pair of vectors u_k = (s_k - H_k y_k) / (s_k^T H_k y_k) and
+    w_k = H_k^T s_k, so H_k b = J_0^(-1) b + sum of u_j (w_j . b), which costs one solve
+    with J_0 and O(kn) work instead of forming or refactoring any matrix.
+    """
+    def __init__(self, step):
+        """
+        :param step: the LinearStep of the Jacobian to start from
+        """
+        self.step = step
+        self.updates = []
+
+    def apply(self, vector):
+        """
+        Return H b for the current approximation H of the inverse Jacobian.
+        """
+        result = self.step.solve(vector)
+        for u, w in self.updates:
+            result += u * (w @ vector)
+        return result
+
+    def apply_transposed(self, vector):
+        """
+        Return H^T b for the current approximation H of the inverse Jacobian.
+        """
+        result = self.step.solve(vector, transposed=True)
+        for u, w in self.updates:
+            result += w * (u @ vector)
+        return result
+
+    def update(self, step, change):
+        """
+        Update the approximation after a step s moved F by y, unless s^T H y is too small
+        for the update to be stable.
+
+        :param step: the step s = x_{k+1} - x_k
+        :param change: the change y = F(x_{k+1}) - F(x_k)
+        :return: true if the approximation was updated; false otherwise
+        """
+        predicted = self.apply(change)
+        scale = step @ predicted
+        if not np.isfinite(scale) or abs(scale) <= 1e-12 * np.linalg.norm(step) * \
+                np.linalg.norm(predicted):
+            return False
+        self.updates.append(((step - predicted) / scale, self.apply_transposed(step)))
+        return True
+
+def newton_system_solve(functions, variables, guess, tol=1e-12, rel_tol=0.0,
+                        residual_tol=0.0, max_iter=100, jacobian="newton", refresh=None,
+                        sparse=False):
+    """
+    Given a system of functions F : R^n --> R^n, its variables, and an initial guess, run
+    Newton's method and return the list of guesses together with the reason it stopped.
+    This collects the guesses yielded by newton_system_iterates, which describes the
+    parameters.
+
+    :param functions: a tuple of sympy expressions
+    :param variables: a tuple of sympy symbols, as many as there are functions
+    :param guess: the initial guess, one value per variable
+    :return: a tuple containing the list of consecutive guesses and the Status it stopped with
+    """
+    return nwtn.collect(newton_system_iterates(functions, variables, guess, tol, rel_tol,
+                                               residual_tol, max_iter, jacobian, refresh,
+                                               sparse))
+
+def newton_system_iterates(functions, variables, guess, tol=1e-12, rel_tol=0.0,
+                           residual_tol=0.0, max_iter=100, jacobian="newton", refresh=None,
+                           sparse=False):
+    """
+    Given a system of functions F : R^n --> R^n, its variables, and an initial guess x_0,
+    run Newton's method
+
+    x_{k+1} = x_k - J(x_k)^(-1) F(x_k),
+
+    where J is the Jacobian of F, and yield the initial guess and then every new guess (as
+    NumPy vectors) as soon as it is computed. The generator returns the Status it stopped
+    with. F and J are compiled once by compile_system and the linear step is solved by
+    LAPACK (or SuperLU for sparse Jacobians, when SciPy is installed).
+
+    The jacobian option chooses how often J is evaluated, which is usually the most
+    expensive part of a step:
+
+    - "newton" evaluates and factors J at every step, for quadratic convergence.
+    - "reuse" keeps a factored J for up to refresh steps (the chord method), so most steps
+      cost only an evaluation of F and a solve with the old factors.
+    - "broyden" also keeps J for up to refresh steps, but corrects its inverse after every
+      step by Broyden's rank-one update, which restores superlinear convergence.
+
+    In the last two modes, J is also evaluated again whenever a step fails to reduce the
+    largest |f_i| by at least half, and refresh defaults to no limit.
+
+    The iteration stops with Status.RESIDUAL_TOLERANCE once every |f_i(x_k)| <=
+    residual_tol, with Status.STEP_TOLERANCE once every component of a step satisfies
+    |s_i| <= tol + rel_tol * |x_i|, with Status.ZERO_DERIVATIVE if J is singular, with
+    Status.DIVERGED if a guess stops being finite, and with Status.MAX_ITERATIONS after
+    max_iter steps.
+
+    :param functions: a tuple of sympy expressions
+    :param variables: a tuple of sympy symbols, as many as there are functions
+    :param guess: the initial guess, one value per variable
+    :param tol: the absolute tolerance on each component of the step
+    :param rel_tol: the tolerance on each component of the step relative to the guess
+    :param residual_tol: the tolerance on each |f_i(x_k)|
+    :param max_iter: the largest number of steps to take
+    :param jacobian: one of "newton", "reuse", or "broyden"
+    :param refresh: the largest number of steps between evaluations of J, for "reuse" and
+    "broyden"; None for no limit
+    :param sparse: boolean to specify if J should be compiled and factored as a sparse matrix
+    :return: a generator of consecutive guesses which returns the Status it stopped with
+    """
+    if jacobian not in JACOBIAN_MODES:
+        raise ValueError(f"Unknown Jacobian mode {jacobian}; use one of "
+                         f"{', '.join(JACOBIAN_MODES)}")
+    if len(functions) != len(variables):
+        raise ValueError(f"The system has {len(functions)} equations in "
+                         f"{len(variables)} unknowns")
+
+    recorder = instr.ACTIVE
+    with instr.phase("compile"):
+        evaluate, derivative = compile_system(tuple(functions), tuple(variables), sparse)
+
+    size = len(variables)
+    if jacobian == "newton":
+        refresh = 1
+    guess = np.array(guess, dtype=float)
+    if guess.shape != (size,):
+        raise ValueError(f"The guess needs {size} values, one per unknown")
+    yield guess
+
+    values = evaluate(guess)
+    if recorder is not None:
+        recorder.count("function_evaluations")
+    inverse = None
+    age = 0
+
+    for _ in range(max_iter):
+        residual = np.max(np.abs(values)) if size else 0.0
+        if residual <= residual_tol:
+            return Status.RESIDUAL_TOLERANCE
+
+        if inverse is None or (refresh is not None and age >= refresh):
+            if recorder is not None:
+                recorder.count("jacobian_evaluations")
+            try:
+                step = LinearStep(derivative(guess), size, reused=jacobian != "newton")
+            except np.linalg.LinAlgError:
+                return Status.ZERO_DERIVATIVE
+            inverse = BroydenInverse(step)
+            age = 0
+
+        try:
+            step = -inverse.apply(values)
+        except np.linalg.LinAlgError:
+            return Status.ZERO_DERIVATIVE
+        if not np.all(np.isfinite(step)):
+            return Status.DIVERGED
+
+        new_guess = guess + step
+        new_values = evaluate(new_guess)
+        age += 1
+        if recorder is not None:
+            recorder.count("function_evaluations")
+            recorder.iteration("newton_system", residual=residual,
+                               step=np.max(np.abs(step)) if size else 0.0)
+        yield new_guess
+
+        if not np.all(np.isfinite(new_values)):
+            return Status.DIVERGED
+        if np.all(np.abs(step) <= tol + rel_tol * np.abs(new_guess)):
+            return Status.STEP_TOLERANCE
+
+        if jacobian != "newton" and np.max(np.abs(new_values)) > STALL_RATIO * residual:
+            inverse = None
+        elif jacobian == "broyden":
+            if inverse.update(step, new_values - values) and recorder is not None:
+                recorder.count("broyden_updates")
+
+        guess, values = new_guess, new_values
+
+    return Status.MAX_ITERATIONS
+
+def main():
+    functions, variables, guess = get_system_info()
+    print(f"System: {', '.join(str(function) for function in functions)} = 0 "
+          f"in {', '.join(str(variable) for variable in variables)}\n")
+
+    max_iter = 100
+    approximations, status = newton_system_solve(functions, variables, guess,
+                                                 max_iter=max_iter)
+    for i, approximation in enumerate(approximations):
+        print(f"Approximation {i}: {approximation.tolist()}\n")
+
+    if status == Status.ZERO_DERIVATIVE:
+        print("The Jacobian became singular, so the existence of a root is not guaranteed.")
+    elif status == Status.MAX_ITERATIONS:
+        print(f"Newton's method did not converge within {max_iter} iterations.")
+    elif status == Status.DIVERGED:
+        print("Newton's method diverged.")
+
+if __name__ == "__main__":
+    main()
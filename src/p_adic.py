@@ -0,0 +1,275 @@
+import operator
+from functools import partial
+from expression_cache import integer_polynomial
+from polynomial_helpers import horner_mod
+from hensel_helpers import hensel_extend_mod, residue_digits
+
+def lift_constant(value, residue, precision, new_precision, prime):
+    """
+    Lifter of the p-adic integer equal to an int: return the value mod p^(new_precision).
+    """
+    return value % pow(prime, new_precision)
+
+def lift_root(coefficients, slopes, residue, precision, new_precision, prime):
+    """
+    Lifter of a simple root of the polynomial with the given coefficients and derivative
+    coefficients: lift the root from mod p^precision to mod p^(new_precision) by Hensel's
+    lemma.
+    """
+    return hensel_extend_mod(coefficients, slopes, residue, prime, precision, new_precision)
+
+def lift_combination(operation, first, second, residue, precision, new_precision, prime):
+    """
+    Lifter of the sum, difference, or product of two lazy p-adic integers: extend both
+    of them and combine them again at the new precision.
+    """
+    modulus = pow(prime, new_precision)
+    return operation(first.residue_at(new_precision), second.residue_at(new_precision)) % modulus
+
+def lift_inverse(number, residue, precision, new_precision, prime):
+    """
+    Lifter of the inverse of a lazy p-adic unit: extend the unit and invert it again at the
+    new precision.
+    """
+    modulus = pow(prime, new_precision)
+    return pow(number.residue_at(new_precision), -1, modulus)
+
+class PAdicInteger:
+    """
+    This class represents a p-adic integer known mod p^k as a single int residue in
+    [0, p^k) together with its precision k, so it takes O(k log p) bits. A number may carry
+    a lifter, a callable lifter(residue, precision, new_precision, prime) returning its
+    residue mod a higher power of p; such a number is lazy and computes more digits only
+    when they are asked for. Roots from from_root, ints, and the results of arithmetic
+    between lazy numbers are lazy, while numbers known to a fixed precision (such as
+    singular roots or decoded numbers) are not. p-adic integers are unhashable, since they
+    compare equal whenever they agree to the lower of their precisions.
+
+    ex) root = PAdicInteger.from_root(x**2 - 2, 3, 7) is the 7-adic square root of 2
+        starting with the digit 3; root[:4] is [3, 1, 2, 6], str(root) is "...6213"
+        once those four digits are known, and root * root == 2.
+    """
+    __slots__ = ("residue", "prime", "precision", "lifter")
+
+    def __init__(self, residue, prime, precision, lifter=None):
+        """
+        :param residue: an int whose residue mod p^precision is the number
+        :param prime: a prime number p
+        :param precision: the number of known digits k
+        :param lifter: a callable computing the residue to a higher precision; None if
+        the number cannot be extended
+        """
+        self.prime = prime
+        self.precision = precision
+        self.residue = residue % pow(prime, precision)
+        self.lifter = lifter
+
+    @classmethod
+    def from_int(cls, value, prime, precision=1):
+        """
+        Return the p-adic integer equal to an int, known to the given precision and
+        extended on request.
+
+        :param value: an int
+        :param prime: a prime number p
+        :param precision: the number of digits to start with
+        :return: a lazy PAdicInteger
+        """
+        return cls(value, prime, precision, partial(lift_constant, value))
+
+    @classmethod
+    def from_root(cls, polynomial, root, prime, precision=1):
+        """
+        Given a polynomial with integer coefficients and a simple root of it mod p (one
+        where f'(root) is not 0 mod p), return the p-adic root it lifts to, known to the
+        given precision and extended by Hensel's lemma on request.
+
+        :param polynomial: a polynomial with integer coefficients
+        :param root: a simple root of the polynomial mod p
+        :param prime: a prime number p
+        :param precision: the number of digits to start with
+        :return: a lazy PAdicInteger
+        """
+        coefficients, slopes = integer_polynomial(polynomial)
+        root %= prime
+        if horner_mod(coefficients, root, prime) != 0 or horner_mod(slopes, root, prime) == 0:
+            raise ValueError(f"{root} is not a simple root mod {prime}")
+
+        lifter = partial(lift_root, coefficients, slopes)
+        return cls(lifter(root, 1, precision, prime), prime, precision, lifter)
+
+    @classmethod
+    def decode(cls, text):
+        """
+        Return the p-adic integer held by a string from encode. The number is known to the
+        encoded precision only.
+
+        :param text: a string of the form "p^k:residue", with the residue in hexadecimal
+        :return: a PAdicInteger
+        """
+        modulus, residue = text.split(":")
+        prime, precision = modulus.split("^")
+        return cls(int(residue, 16), int(prime), int(precision))
+
+    def encode(self):
+        """
+        Return the number as a compact string "p^k:residue", with the residue in
+        hexadecimal, which decode turns back into the number.
+
+        ex) The 7-adic square root of 2 known to 4 digits is "7^4:876".
+
+        :return: a string holding the prime, precision, and residue
+        """
+        return f"{self.prime}^{self.precision}:{self.residue:x}"
+
+    def extend(self, precision):
+        """
+        Compute the number to at least the given number of digits, raising a ValueError if
+        it has no lifter and is not known that far.
+
+        :param precision: the number of digits needed
+        """
+        if precision <= self.precision:
+            return
+        if self.lifter is None:
+            raise ValueError(f"Only {self.precision} digits of this {self.prime}-adic integer "
+                             "are known")
+        self.residue = self.lifter(self.residue, self.precision, precision, self.prime)
+        self.precision = precision
+
+    def residue_at(self, precision):
+        """
+        Return the residue of the number mod p^precision, extending it if needed.
+
+        :param precision: the power of p to reduce by
+        :return: the residue in [0, p^precision)
+        """
+        self.extend(precision)
+        return self.residue % pow(self.prime, precision)
+
+    def inverse(self):
+        """
+        Return the inverse of the number, which must be a unit (not divisible by p).
+
+        :return: a PAdicInteger to the same precision, lazy if this number is
+        """
+        if self.residue % self.prime == 0:
+            raise ValueError(f"{self!r} is not a unit in the {self.prime}-adic integers")
+
+        lifter = None if self.lifter is None else partial(lift_inverse, self)
+        return PAdicInteger(pow(self.residue, -1, pow(self.prime, self.precision)),
+                            self.prime, self.precision, lifter)
+
+    def coerce(self, other):
+        """
+        Return the other operand of an arithmetic operation as a PAdicInteger over the
+        same prime, or NotImplemented if it cannot be one.
+        """
+        if isinstance(other, int):
+            return PAdicInteger.from_int(other, self.prime, self.precision)
+        if not isinstance(other, PAdicInteger):
+            return NotImplemented
+        if other.prime != self.prime:
+            raise ValueError(f"Cannot combine {self.prime}-adic and {other.prime}-adic integers")
+        return other
+
+    def combine(self, other, operation, reflected=False):
+        """
+        Return operation(self, other), or operation(other, self) if reflected is true, to
+        the lower of the two precisions. The result is lazy if both operands are.
+        """
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return NotImplemented
+
+        first, second = (other, self) if reflected else (self, other)
+        precision = min(self.precision, other.precision)
+        lifter = None
+        if self.lifter is not None and other.lifter is not None:
+            lifter = partial(lift_combination, operation, first, second)
+
+        return PAdicInteger(operation(first.residue_at(precision), second.residue_at(precision)),
+                            self.prime, precision, lifter)
+
+    def __add__(self, other):
+        return self.combine(other, operator.add)
+
+    def __radd__(self, other):
+        return self.combine(other, operator.add, reflected=True)
+
+    def __sub__(self, other):
+        return self.combine(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self.combine(other, operator.sub, reflected=True)
+
+    def __mul__(self, other):
+        return self.combine(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self.combine(other, operator.mul, reflected=True)
+
+    def __truediv__(self, other):
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return NotImplemented
+        return self * other.inverse()
+
+    def __rtruediv__(self, other):
+        return self.inverse() * other
+
+    def __neg__(self):
+        return 0 - self
+
+    def __eq__(self, other):
+        """
+        Two p-adic integers are equal if they agree to the precision of the less precise one.
+        """
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return NotImplemented
+        precision = min(self.precision, other.precision)
+        return self.residue_at(precision) == other.residue_at(precision)
+
+    # Equality to the lower of two precisions is not transitive (and an int equals every
+    # p-adic integer congruent to it), so no hash can agree with it; key on encode()
+    # instead.
+    __hash__ = None
+
+    def __getitem__(self, index):
+        """
+        Return the digit of p^index, or the list of digits in a slice of the powers of p.
+        A slice without an end stops at the digits known so far. Digits beyond those are
+        computed first if the number is lazy, at least doubling its precision so that
+        reading the digits one at a time stays cheap.
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.start or 0, index.stop, index.step or 1
+            if stop is None:
+                stop = self.precision
+        else:
+            start, stop, step = index, index + 1, 1
+
+        if start < 0 or stop < 0:
+            raise IndexError("The digits of a p-adic integer are indexed from 0")
+        if stop > self.precision:
+            if self.lifter is None:
+                raise IndexError(f"Only {self.precision} digits of this {self.prime}-adic "
+                                 "integer are known")
+            self.extend(max(stop, 2 * self.precision))
+
+        if not isinstance(index, slice):
+            return self.residue // pow(self.prime, index) % self.prime
+        if start >= stop:
+            return []
+        chunk = self.residue // pow(self.prime, start)
+        return list(residue_digits(chunk, self.prime, stop - start))[::step]
+
+    def __int__(self):
+        return self.residue
+
+    def __repr__(self):
+        return f"PAdicInteger({self.residue}, {self.prime}, {self.precision})"
+
+    def __str__(self):
+        return "..." + "".join(str(digit) for digit in reversed(self[:]))
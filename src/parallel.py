@@ -0,0 +1,147 @@
+import os
+import signal
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import redirect_stdout
+from itertools import islice
+from polynomial_helpers import coefficient_list, is_integer
+from rootfinder import JobTimeout, allow_long_integers, solve_problem
+
+TIMEOUT_MESSAGE = "Timed out"
+
+def raise_timeout(signum, frame):
+    """
+    Signal handler which raises JobTimeout when a job's alarm goes off.
+    """
+    raise JobTimeout(TIMEOUT_MESSAGE)
+
+def pack_problem(problem):
+    """
+    Given a problem whose "function" may be a sympy expression or a tuple of coefficients,
+    return a copy which is cheap to send to another process: polynomials with integer
+    coefficients become a list of "coefficients", and any other expression becomes its
+    string.
+
+    :param problem: a dictionary describing the problem
+    :return: a dictionary describing the same problem without any sympy objects
+    """
+    function = problem.get("function")
+    if function is None or isinstance(function, str):
+        return problem
+
+    packed = dict(problem)
+    coefficients = coefficient_list(function)
+    if coefficients is not None and all(is_integer(c) for c in coefficients):
+        del packed["function"]
+        packed["coefficients"] = [int(coefficient) for coefficient in coefficients]
+    else:
+        packed["function"] = str(function)
+    return packed
+
+def solve_with_timeout(problem, timeout, sequence=False):
+    """
+    Solve a problem as solve_problem does, but give up on it after timeout seconds and
+    report the timeout as its error. The timeout relies on SIGALRM, so it is only enforced
+    on platforms which have it, and only in a process's main thread.
+
+    :param problem: a dictionary describing the problem
+    :param timeout: the number of seconds the problem may run for; None for no limit
+    :param sequence: boolean to specify if the full sequences should be returned as well
+    :return: a dictionary holding the result or the error
+    """
+    if timeout is None or not hasattr(signal, "SIGALRM"):
+        return solve_problem(problem, sequence)
+
+    previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        result = solve_problem(problem, sequence)
+    except JobTimeout:
+        result = {"id": problem["id"]} if "id" in problem else {}
+        result["solver"] = problem.get("solver")
+        result["error"] = f"{TIMEOUT_MESSAGE} after {timeout} seconds"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+    return result
+
+def solve_chunk(chunk, timeout, sequence=False):
+    """
+    Solve a chunk of (index, problem) pairs inside a worker process and return the
+    (index, result) pairs. Anything the solvers print is sent to stderr, and the worker
+    may convert ints of any length to strings, as the command line does.
+
+    :param chunk: a list of (index, problem) pairs
+    :param timeout: the number of seconds each problem may run for; None for no limit
+    :param sequence: boolean to specify if the full sequences should be returned as well
+    :return: a list of (index, result) pairs
+    """
+    allow_long_integers()
+    with redirect_stdout(sys.stderr):
+        return [(index, solve_with_timeout(problem, timeout, sequence))
+                for index, problem in chunk]
+
+def chunked(problems, chunk_size):
+    """
+    Given an iterable of problems, yield lists of up to chunk_size (index, problem) pairs,
+    with every problem packed for sending to a worker process.
+
+    :param problems: an iterable of problem dictionaries
+    :param chunk_size: the largest number of problems per chunk
+    :return: a generator of lists of (index, problem) pairs
+    """
+    numbered = ((index, pack_problem(problem)) for index, problem in enumerate(problems))
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def solve_parallel(problems, workers=None, chunk_size=64, timeout=None, ordered=True,
+                   sequence=False):
+    """
+    Given an iterable of independent problems (as accepted by rootfinder.solve_problem),
+    solve them on a pool of worker processes and yield their results. Problems are sent in
+    chunks of chunk_size, with polynomials packed as coefficient lists, and only a few
+    chunks per worker are in flight at once, so the problems may be a stream of any length.
+
+    If ordered is true the results are yielded in input order; otherwise they are yielded
+    as soon as their chunk finishes, each with the "index" of its problem in the input.
+    Any problem running longer than timeout seconds is abandoned with an error result, so
+    that a pathological polynomial cannot stall a worker.
+
+    :param problems: an iterable of problem dictionaries
+    :param workers: the number of worker processes; None for one per CPU
+    :param chunk_size: the largest number of problems sent to a worker at once
+    :param timeout: the number of seconds each problem may run for; None for no limit
+    :param ordered: boolean to specify if results should be yielded in input order
+    :param sequence: boolean to specify if the full sequences should be returned as well
+    :return: a generator of result dictionaries
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(problems, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in islice(chunks, 2 * workers):
+            pending.append(executor.submit(solve_chunk, chunk, timeout, sequence))
+
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
+
+            for future in done:
+                for index, result in future.result():
+                    if not ordered:
+                        result["index"] = index
+                    yield result
+
+            for chunk in islice(chunks, len(done)):
+                pending.append(executor.submit(solve_chunk, chunk, timeout, sequence))
\ No newline at end of file
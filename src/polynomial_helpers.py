@@ -0,0 +1,240 @@
+import re
+from functools import lru_cache
+
+TOKEN = re.compile(r"\s*(?:(\d+)|(\*\*|[-+*()])|([A-Za-z_]\w*)|(\S))", re.ASCII)
+MAX_PARSED_DEGREE = 1000
+MAX_PARSED_BITS = 1 << 20
+PARSE_CACHE_SIZE = 512
+
+class PolynomialTooLarge(ValueError):
+    """
+    This exception rejects a polynomial with a constant too large to compute, such as
+    3**3**19, which sympy would also try to evaluate.
+    """
+
+def coefficient_list(polynomial):
+    """
+    Given a polynomial f(x), return its list of coefficients ordered from the leading
+    term down to the constant term, or None if f is not a polynomial in x. A tuple of
+    coefficients (as returned by parse_polynomial) is returned as a list without its
+    leading zeros.
+
+    ex) For f(x) = 2x^3 - x + 5, return [2, 0, -1, 5].
+
+    :param polynomial: a sympy expression in x, or a tuple of coefficients
+    :return: a list of coefficients from highest degree to lowest; None if f is not
+    a polynomial
+    """
+    if isinstance(polynomial, tuple):
+        coefficients = list(polynomial)
+        while len(coefficients) > 1 and coefficients[0] == 0:
+            coefficients.pop(0)
+        return coefficients or [0]
+
+    from sympy import Poly
+    from sympy.abc import x
+    if not polynomial.is_polynomial(x):
+        return None
+    return Poly(polynomial, x).all_coeffs()
+
+def integer_coefficients(polynomial):
+    """
+    Given a polynomial f(x) with integer coefficients, return its coefficients as plain
+    Python ints ordered from the leading term down to the constant term.
+
+    :param polynomial: a sympy polynomial in x with integer coefficients, or a tuple of
+    int coefficients
+    :return: a list of int coefficients from highest degree to lowest
+    """
+    coefficients = coefficient_list(polynomial)
+    if coefficients is None or not all(is_integer(coefficient) for coefficient in coefficients):
+        raise ValueError("Not a polynomial with integer coefficients")
+    return [int(coefficient) for coefficient in coefficients]
+
+def is_integer(number):
+    """
+    Return true if the number is a Python int or a sympy integer, and false otherwise.
+
+    :param number: a Python or sympy number
+    :return: true if the number is an integer; false otherwise
+    """
+    return isinstance(number, int) or getattr(number, "is_integer", False) is True
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_polynomial(function):
+    """
+    Given a string holding a polynomial in x with integer coefficients, written with +, -,
+    *, ** (to non-negative integer powers), parentheses, integers, and x, return its
+    coefficients as a tuple of ints from the leading term down to the constant term, using
+    only the standard library. Return None for anything else (such as other symbols,
+    functions, fractions, or decimals, or degrees above MAX_PARSED_DEGREE), which must then
+    be parsed by sympy; any string parsed here means the same polynomial to sympy. A
+    constant power of more than MAX_PARSED_BITS bits raises PolynomialTooLarge instead.
+    The results are cached by the string, as parse_function's are.
+
+    ex) For "(x - 1)*(x + 2)**2", return (1, 3, 0, -4).
+
+    :param function: a string holding a mathematical expression
+    :return: a tuple of int coefficients from highest degree to lowest; None if the
+    string is not such a polynomial
+    """
+    tokens = []
+    for number, operator, name, other in TOKEN.findall(function):
+        if other or (name and name != "x"):
+            return None
+        tokens.append(int(number) if number else operator or name)
+
+    parser = PolynomialParser(tokens)
+    try:
+        polynomial = parser.expression()
+    except PolynomialTooLarge:
+        raise
+    except (IndexError, ValueError):
+        return None
+    if parser.position != len(tokens):
+        return None
+
+    while len(polynomial) > 1 and polynomial[-1] == 0:
+        polynomial.pop()
+    return tuple(reversed(polynomial))
+
+class PolynomialParser:
+    """
+    This class parses a list of tokens from parse_polynomial by recursive descent, with
+    the precedence of Python (and sympy), into a list of int coefficients from the constant
+    term up. It raises a ValueError for any syntax that parse_polynomial does not accept.
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def expression(self):
+        result = self.term()
+        while self.peek() in ("+", "-"):
+            sign = 1 if self.take() == "+" else -1
+            result = add_polynomials(result, self.term(), sign)
+        return result
+
+    def term(self):
+        result = self.unary()
+        while self.peek() == "*":
+            self.take()
+            result = multiply_polynomials(result, self.unary())
+        return result
+
+    def unary(self):
+        if self.peek() in ("+", "-"):
+            sign = 1 if self.take() == "+" else -1
+            return [sign * coefficient for coefficient in self.unary()]
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        if self.peek() != "**":
+            return base
+
+        self.take()
+        exponent = self.unary()
+        if len(exponent) > 1 and any(exponent[1:]) or exponent[0] < 0:
+            raise ValueError("Not a polynomial")
+        exponent = exponent[0]
+        if len(base) == 1:
+            if (abs(base[0]).bit_length() - 1) * exponent > MAX_PARSED_BITS:
+                raise PolynomialTooLarge(f"The constant {base[0]}**{exponent} is too large")
+            return [base[0] ** exponent]
+        if (len(base) - 1) * exponent > MAX_PARSED_DEGREE:
+            raise ValueError("Degree too large")
+
+        result = [1]
+        while exponent:
+            if exponent & 1:
+                result = multiply_polynomials(result, base)
+            exponent >>= 1
+            if exponent:
+                base = multiply_polynomials(base, base)
+        return result
+
+    def atom(self):
+        token = self.take()
+        if token == "(":
+            result = self.expression()
+            if self.take() != ")":
+                raise ValueError("Unbalanced parentheses")
+            return result
+        if token == "x":
+            return [0, 1]
+        if isinstance(token, int):
+            return [token]
+        raise ValueError(f"Unexpected {token}")
+
+def add_polynomials(a, b, sign=1):
+    """
+    Return a(x) + sign * b(x), for coefficient lists ordered from the constant term up.
+    """
+    length = max(len(a), len(b))
+    a = a + [0] * (length - len(a))
+    b = b + [0] * (length - len(b))
+    return [first + sign * second for first, second in zip(a, b)]
+
+def multiply_polynomials(a, b):
+    """
+    Return a(x) * b(x), for coefficient lists ordered from the constant term up.
+    """
+    product = [0] * (len(a) + len(b) - 1)
+    for i, first in enumerate(a):
+        if first:
+            for j, second in enumerate(b):
+                product[i + j] += first * second
+    return product
+
+def derivative_coefficients(coefficients):
+    """
+    Given the coefficients of a polynomial f(x) (highest degree first), return the
+    coefficients of its derivative f'(x) in the same order.
+
+    :param coefficients: a list of coefficients from highest degree to lowest
+    :return: a list of coefficients of the derivative from highest degree to lowest
+    """
+    degree = len(coefficients) - 1
+    derivative = [coefficient * (degree - i) for i, coefficient in enumerate(coefficients[:-1])]
+    return derivative if derivative else [0]
+
+def horner(coefficients, value):
+    """
+    Given the coefficients of a polynomial f(x) (highest degree first) and an input
+    value, return f(value) using Horner's scheme
+
+    f(x) = (...((a_n x + a_{n-1}) x + a_{n-2}) x + ...) x + a_0.
+
+    :param coefficients: a list of coefficients from highest degree to lowest
+    :param value: an input x value
+    :return: the polynomial's value at that input
+    """
+    result = 0
+    for coefficient in coefficients:
+        result = result * value + coefficient
+    return result
+
+def horner_mod(coefficients, value, modulus):
+    """
+    Given the integer coefficients of a polynomial f(x) (highest degree first), an
+    integer input value, and a modulus m, return f(value) mod m in [0, m), reducing
+    after every step of Horner's scheme so intermediate values never exceed m^2.
+
+    :param coefficients: a list of int coefficients from highest degree to lowest
+    :param value: an integer input x value
+    :param modulus: a positive integer modulus
+    :return: the polynomial's value at that input mod the modulus
+    """
+    value %= modulus
+    result = 0
+    for coefficient in coefficients:
+        result = (result * value + coefficient) % modulus
+    return result
\ No newline at end of file
@@ -0,0 +1,179 @@
+from functools import partial
+from itertools import zip_longest
+from math import gcd
+from expression_cache import integer_polynomial
+from polynomial_helpers import derivative_coefficients
+from lift_cache import lift_simple_root
+from finite_field_helpers import roots_mod_p
+from congruence_helpers import lift_congruence_solutions
+
+GMPY_DEGREE = 64
+
+def prime_sieve(bound):
+    """
+    Return every prime p <= bound in increasing order, by the sieve of Eratosthenes.
+
+    :param bound: the largest number to consider
+    :return: a list of primes
+    """
+    if bound < 2:
+        return []
+
+    composite = bytearray(bound + 1)
+    for number in range(2, int(bound ** 0.5) + 1):
+        if not composite[number]:
+            start = number * number
+            composite[start::number] = b"\x01" * len(range(start, bound + 1, number))
+    return [number for number in range(2, bound + 1) if not composite[number]]
+
+def polynomial_discriminant(coefficients):
+    """
+    Given the integer coefficients of a polynomial f(x) (highest degree first), return the
+    discriminant of f times its leading coefficient, or 0 if f has a repeated factor or is
+    constant. Every root mod p of f is simple for each prime p not dividing this number,
+    so those primes need no search for singular roots.
+
+    Since disc(f) = (-1)^(n(n-1)/2) Res(f, f') / lc(f), the value is the signed resultant
+    of f and f'. Beyond GMPY_DEGREE its intermediate numbers grow large enough to be worth
+    importing gmpy2 for, if it is installed.
+
+    :param coefficients: a tuple of int coefficients from highest degree to lowest
+    :return: an int divisible by every prime at which f may have a singular root mod p
+    """
+    degree = len(coefficients) - 1
+    if degree < 1:
+        return 0
+    if degree >= GMPY_DEGREE:
+        try:
+            from gmpy2 import mpz
+            coefficients = [mpz(coefficient) for coefficient in coefficients]
+        except ImportError:
+            pass
+
+    sign = -1 if degree * (degree - 1) // 2 % 2 else 1
+    return int(sign * resultant(coefficients, derivative_coefficients(coefficients)))
+
+def pseudo_remainder(a, b):
+    """
+    Return the pseudo-remainder of a(x) by b(x): the remainder of lc(b)^(deg a - deg b + 1)
+    * a(x) divided by b(x), which has integer coefficients whenever a and b do.
+
+    :param a: a list of int coefficients from highest degree to lowest
+    :param b: a list of int coefficients from highest degree to lowest, with deg b <= deg a
+    :return: a list of int coefficients of the pseudo-remainder, without leading zeros
+    """
+    remainder = list(a)
+    leading, rest = b[0], b[1:]
+    for _ in range(len(a) - len(b) + 1):
+        factor = remainder[0]
+        remainder = [leading * first - factor * second
+                     for first, second in zip_longest(remainder[1:], rest, fillvalue=0)]
+    while remainder and remainder[0] == 0:
+        remainder.pop(0)
+    return remainder
+
+def resultant(a, b):
+    """
+    Return the resultant of two non-constant polynomials a(x) and b(x) with integer
+    coefficients by the subresultant pseudo-remainder sequence (Cohen, Algorithm 3.3.7),
+    whose exact divisions keep the coefficients as small as the subresultants.
+
+    :param a: a list of int coefficients from highest degree to lowest
+    :param b: a list of int coefficients from highest degree to lowest
+    :return: the resultant as an int
+    """
+    if not any(a) or not any(b):
+        return 0
+    if len(a) < len(b):
+        odd = (len(a) - 1) % 2 and (len(b) - 1) % 2
+        return -resultant(b, a) if odd else resultant(b, a)
+
+    content_a, content_b = gcd(*a), gcd(*b)
+    a = [coefficient // content_a for coefficient in a]
+    b = [coefficient // content_b for coefficient in b]
+    scale = content_a ** (len(b) - 1) * content_b ** (len(a) - 1)
+
+    sign = 1
+    g = h = 1
+    while len(b) > 1:
+        delta = len(a) - len(b)
+        if (len(a) - 1) % 2 and (len(b) - 1) % 2:
+            sign = -sign
+        remainder = pseudo_remainder(a, b)
+        if not remainder:
+            return 0
+        divisor = g * h ** delta
+        a, b = b, [coefficient // divisor for coefficient in remainder]
+        g = a[0]
+        h = g ** delta // h ** (delta - 1) if delta else h
+
+    degree = len(a) - 1
+    h = b[0] ** degree // h ** (degree - 1) if degree else h
+    return sign * scale * h
+
+def sweep_prime(coefficients, slopes, discriminant_value, power, prime):
+    """
+    Solve f(x) === 0 (mod p^n) for one prime of a sweep, given the precomputed coefficients
+    of f and f' and the value of polynomial_discriminant. Primes not dividing that value
+    have only simple roots mod p, so each one is lifted straight to p^n by Hensel's lemma.
+
+    :param coefficients: a tuple of int coefficients of f from highest degree to lowest
+    :param slopes: a tuple of int coefficients of f' from highest degree to lowest
+    :param discriminant_value: the value of polynomial_discriminant for f
+    :param power: the power of the modulus
+    :param prime: the prime p
+    :return: a tuple of the prime, the sorted solutions mod p^n, and a boolean which is true
+    if the prime divides the discriminant value (so f may have singular roots mod p)
+    """
+    roots = roots_mod_p(coefficients, prime)
+    if discriminant_value % prime == 0:
+        return prime, lift_congruence_solutions(coefficients, roots, prime, power), True
+    return prime, sorted(lift_simple_root(coefficients, slopes, root, prime, power)
+                         for root in roots), False
+
+def sweep_chunk(coefficients, slopes, discriminant_value, power, primes):
+    """
+    Run sweep_prime over a chunk of primes inside a worker process.
+
+    :return: a list of the tuples returned by sweep_prime
+    """
+    return [sweep_prime(coefficients, slopes, discriminant_value, power, prime)
+            for prime in primes]
+
+def sweep_primes(polynomial, bound, power=1, workers=None, chunk_size=256):
+    """
+    Given a polynomial f(x) with integer coefficients, a bound B, and a power n, solve
+
+    f(x) === 0 (mod p^n)
+
+    for every prime p <= B and yield one row (p, solutions, singular) per prime, in
+    increasing order of p, as soon as it is known. The solutions lie in [0, p^n), and
+    singular is true for the primes dividing the discriminant or the leading coefficient,
+    at which f may have repeated roots mod p (so their roots are not all p-adic roots).
+
+    The polynomial is converted to integer coefficients and its discriminant is computed
+    once for the whole sweep. If workers is given, the primes are split into chunks of
+    chunk_size and solved on that many processes.
+
+    :param polynomial: a polynomial with integer coefficients
+    :param bound: the largest prime to consider
+    :param power: the power of the modulus
+    :param workers: the number of worker processes; None to solve in this process
+    :param chunk_size: the number of primes sent to a worker at once
+    :return: a generator of (prime, solutions, singular) tuples
+    """
+    coefficients, slopes = integer_polynomial(polynomial)
+    discriminant_value = polynomial_discriminant(coefficients)
+    primes = prime_sieve(bound)
+
+    if not workers:
+        for prime in primes:
+            yield sweep_prime(coefficients, slopes, discriminant_value, power, prime)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    chunks = [primes[start:start + chunk_size] for start in range(0, len(primes), chunk_size)]
+    solve = partial(sweep_chunk, coefficients, slopes, discriminant_value, power)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for rows in executor.map(solve, chunks):
+            yield from rows
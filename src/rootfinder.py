@@ -0,0 +1,670 @@
+import argparse
+import csv
+import json
+import sys
+from contextlib import ExitStack, redirect_stdout
+from math import prod
+from terminal_ui import check_function, check_system
+from expression_cache import polynomial_from_coefficients
+from finite_field_helpers import is_prime
+from hensel_lift import hensel_roots, hensel_all_roots
+from congruences import congruence_roots
+from congruence_helpers import root_chains
+from prime_sweep import sweep_primes
+from composite_congruences import (prime_power_solutions, crt_solutions,
+                                   count_composite_congruence_roots)
+from instrumentation import recording
+from lift_cache import caching
+
+INTEGER_FIELDS = ("accuracy", "prime", "power", "max_iter", "bound", "modulus", "refresh")
+FLOAT_FIELDS = ("abs_tol", "rel_tol", "residual_tol", "tol")
+BOOLEAN_FIELDS = ("exact", "count_only", "sparse")
+TRUE_WORDS = ("true", "yes", "1")
+FALSE_WORDS = ("false", "no", "0")
+
+class JobTimeout(Exception):
+    """
+    This exception interrupts a job which has run for longer than its timeout. Unlike
+    other errors, solve_problem lets it through, so that whoever set the timeout can
+    report it.
+    """
+
+def format_real(value, accuracy):
+    """
+    Given a guess computed by Newton's method and the requested accuracy, return it in a
+    form JSON can hold: floats as they are, arbitrary-precision numbers as strings with
+    all of their requested decimal places, and sympy numbers as their strings.
+
+    :param value: a float, mpmath number, or sympy number
+    :param accuracy: the number of accurate decimal places requested
+    :return: the value as a float or a string
+
+    ex) format_real(mpf('1e400'), 3) -> '1.0e+400'
+    """
+    if isinstance(value, float):
+        return value
+
+    from mpmath import mag, mpc, mpf, nstr
+    if isinstance(value, (mpf, mpc)):
+        # mag gives the binary exponent without converting to an int, which a guess
+        # that has run off to 1e+(10^30) could never be. The guess carries no more
+        # digits than were worked with, so longer integer parts are not padded out.
+        integer_digits = max(mag(value), 0) * 1233 // 4096 + 1
+        return nstr(value, accuracy + min(integer_digits, accuracy))
+    return str(value)
+
+def as_integer(value):
+    """
+    Return the given integer-valued number or string as an int, without passing through a
+    float when it is already an integer, so that large guesses keep every digit.
+
+    :param value: an int, float, or string holding an integer value
+    :return: the value as an int
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+def as_boolean(value):
+    """
+    Return the given boolean, 0 or 1, or string holding true, false, yes, no, 1, or 0 (in
+    any case) as a bool, raising a ValueError for anything else, so that a CSV cell such
+    as "false" is not taken as true.
+
+    :param value: a bool, int, or string
+    :return: the value as a bool
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in TRUE_WORDS + FALSE_WORDS:
+        return value.strip().lower() in TRUE_WORDS
+    raise ValueError(f"{value!r} is neither true nor false")
+
+def convert_fields(problem):
+    """
+    Return a copy of a problem with its integer, float, and boolean fields converted to
+    those types, so that problems read from CSV (whose cells are all strings) mean the
+    same as problems read from JSON.
+
+    :param problem: a dictionary describing the problem
+    :return: a dictionary describing the same problem
+    """
+    converted = dict(problem)
+    for fields, convert in ((INTEGER_FIELDS, as_integer), (FLOAT_FIELDS, float),
+                            (BOOLEAN_FIELDS, as_boolean)):
+        for key in fields:
+            if converted.get(key) is not None:
+                try:
+                    converted[key] = convert(converted[key])
+                except ValueError:
+                    raise ValueError(f"Invalid {key} {converted[key]!r}")
+    return converted
+
+def problem_function(problem, is_hensel):
+    """
+    Return the function of a problem, built either from its "coefficients" (a list ordered
+    from the leading term down to the constant term) or by parsing and checking its
+    "function" string. Polynomials with integer coefficients are returned as tuples of
+    ints, which the solvers use without importing sympy; anything else is returned as a
+    sympy expression.
+
+    :param problem: a dictionary describing the problem
+    :param is_hensel: boolean to specify if the function must be a polynomial
+    :return: the function as a tuple of int coefficients or a sympy expression
+    """
+    if "coefficients" in problem:
+        coefficients = tuple(problem["coefficients"])
+        if all(type(coefficient) is int for coefficient in coefficients):
+            return coefficients
+        return polynomial_from_coefficients(coefficients)
+    return check_function(problem["function"], is_hensel, coefficients=True)
+
+def check_prime(prime):
+    """
+    Return the given prime as an int, raising a ValueError if it is not a prime.
+
+    :param prime: a prime number, as an int or string
+    :return: the prime as an int
+    """
+    prime = as_integer(prime)
+    if not is_prime(prime):
+        raise ValueError(f"{prime} is not prime")
+    return prime
+
+def solve_newton_problem(problem, sequence=False):
+    """
+    Given a Newton problem with a "function" (or "coefficients"), "guess", and "accuracy"
+    (and optionally "abs_tol", "rel_tol", "residual_tol", "max_iter", and "exact"), solve
+    it and return the root, the number of iterations, and the criterion Newton's method
+    stopped with.
+
+    :param problem: a dictionary describing the problem
+    :param sequence: boolean to specify if every guess should be returned as well
+    :return: a dictionary holding the result
+    """
+    from newton import newton_solve
+    function = problem_function(problem, False)
+    accuracy = int(problem["accuracy"])
+    options = {key: problem[key] for key in ("abs_tol", "rel_tol", "residual_tol", "max_iter")
+               if key in problem}
+
+    approximations, status = newton_solve(function, float(problem["guess"]), accuracy,
+                                          exact=problem.get("exact", False), **options)
+
+    result = {"root": format_real(approximations[-1], accuracy),
+              "iterations": len(approximations) - 1, "status": status.name}
+    if sequence:
+        result["sequence"] = [format_real(guess, accuracy) for guess in approximations]
+    return result
+
+def solve_hensel_problem(problem, sequence=False):
+    """
+    Given a Hensel problem with a "function" (or "coefficients"), "prime", and "accuracy"
+    (and optionally a "guess"), lift the guess, or every root mod p if there is no guess, and return the
+    residues of each root mod p^(2^(accuracy-1)).
+
+    :param problem: a dictionary describing the problem
+    :param sequence: boolean to specify if every residue should be returned as well
+    :return: a dictionary holding the result
+    """
+    polynomial = problem_function(problem, True)
+    prime = check_prime(problem["prime"])
+    accuracy = int(problem["accuracy"])
+
+    if problem.get("guess") is None:
+        sequences = hensel_all_roots(polynomial, prime, accuracy)
+    else:
+        guess = as_integer(problem["guess"])
+        sequences = {guess: hensel_roots(polynomial, guess, prime, accuracy)}
+
+    result = {"roots": {str(base_root): residues[-1] for base_root, residues in sequences.items()}}
+    if sequence:
+        result["sequences"] = {str(base_root): residues for base_root, residues in sequences.items()}
+    return result
+
+def solve_congruence_problem(problem, sequence=False):
+    """
+    Given a congruence problem with a "function" (or "coefficients"), "prime", and "power",
+    solve f(x) === 0 (mod p^n) and return its solutions in [0, p^n), sorted.
+
+    :param problem: a dictionary describing the problem
+    :param sequence: boolean to specify if the root of every path mod p, ..., p^n should be
+    returned as well
+    :return: a dictionary holding the result
+    """
+    polynomial = problem_function(problem, True)
+    prime = check_prime(problem["prime"])
+    tree = congruence_roots(polynomial, prime, int(problem["power"])) or {}
+
+    chains = root_chains(tree)
+    result = {"roots": sorted(chain[-1] for chain in chains)}
+    if sequence:
+        result["sequences"] = chains
+    return result
+
+def solve_roots_problem(problem, sequence=False):
+    """
+    Given a polynomial problem with a "function" (or "coefficients") and optionally "tol",
+    "rel_tol", and "max_iter", find all of its complex roots at once and return each root
+    as a [real, imaginary] pair, with its error bound and the criterion it stopped with.
+
+    :param problem: a dictionary describing the problem
+    :param sequence: unused, since every root is found by the same iteration
+    :return: a dictionary holding the result
+    """
+    from newton import polynomial_roots
+    from newton_helpers import Status
+    polynomial = problem_function(problem, False)
+    options = {key: problem[key] for key in ("tol", "rel_tol", "max_iter") if key in problem}
+    roots, bounds, status = polynomial_roots(polynomial, **options)
+
+    return {"roots": [[root.real, root.imag] for root in roots.tolist()],
+            "error_bounds": bounds.tolist(),
+            "status": [Status(code).name for code in status.tolist()]}
+
+def solve_system_problem(problem, sequence=False):
+    """
+    Given a system problem with a list of "functions", a "guess" with one value per
+    unknown, and optionally the names of its "variables" (by default every symbol in the
+    functions, sorted by name), "tol", "rel_tol", "residual_tol", "max_iter", "jacobian"
+    (newton, reuse, or broyden), "refresh", and "sparse", solve F(x) = 0 by Newton's method
+    and return the root, the number of iterations, and the criterion it stopped with.
+
+    :param problem: a dictionary describing the problem
+    :param sequence: boolean to specify if every guess should be returned as well
+    :return: a dictionary holding the result
+    """
+    from newton_system import newton_system_solve
+    functions, variables = check_system(problem["functions"], problem.get("variables"))
+    options = {key: problem[key] for key in ("tol", "rel_tol", "residual_tol", "max_iter",
+                                             "jacobian", "refresh") if key in problem}
+
+    approximations, status = newton_system_solve(functions, variables, problem["guess"],
+                                                 sparse=problem.get("sparse", False),
+                                                 **options)
+
+    result = {"variables": [str(variable) for variable in variables],
+              "root": approximations[-1].tolist(), "iterations": len(approximations) - 1,
+              "status": status.name}
+    if sequence:
+        result["sequence"] = [guess.tolist() for guess in approximations]
+    return result
+
+def solve_sweep_problem(problem, sequence=False):
+    """
+    Given a sweep problem with a "function" (or "coefficients"), "bound", and optionally a
+    "power" (1 by default), solve f(x) === 0 (mod p^n) for every prime p <= bound and return
+    the solutions of each prime that has any, along with the primes flagged as singular.
+
+    :param problem: a dictionary describing the problem
+    :param sequence: unused, since every prime is solved to the same power
+    :return: a dictionary holding the result
+    """
+    polynomial = problem_function(problem, True)
+    rows = sweep_primes(polynomial, int(problem["bound"]), int(problem.get("power", 1)))
+
+    result = {"roots": {}, "singular": []}
+    for prime, roots, singular in rows:
+        if roots:
+            result["roots"][str(prime)] = roots
+        if singular:
+            result["singular"].append(prime)
+    return result
+
+def solve_composite_problem(problem, sequence=False):
+    """
+    Given a congruence problem with a "function" (or "coefficients") and any positive
+    "modulus" (and optionally "count_only"), solve f(x) === 0 (mod m) by factoring m and
+    combining the solutions mod each prime power, and return the number of solutions and
+    the solutions in [0, m), sorted. If count_only is true, the solutions are counted
+    without being listed, and only their number is returned.
+
+    :param problem: a dictionary describing the problem
+    :param sequence: boolean to specify if the solutions mod each prime power should be
+    returned as well (unless count_only is true)
+    :return: a dictionary holding the result
+    """
+    polynomial = problem_function(problem, True)
+    modulus = as_integer(problem["modulus"])
+    if problem.get("count_only", False):
+        return {"count": count_composite_congruence_roots(polynomial, modulus)}
+
+    solutions = prime_power_solutions(polynomial, modulus)
+    result = {"count": prod(len(roots) for _, roots in solutions),
+              "roots": sorted(crt_solutions(solutions))}
+    if sequence:
+        result["prime_powers"] = {str(factor): roots for factor, roots in solutions}
+    return result
+
+SOLVERS = {
+    "newton": solve_newton_problem,
+    "hensel": solve_hensel_problem,
+    "congruence": solve_congruence_problem,
+    "roots": solve_roots_problem,
+    "sweep": solve_sweep_problem,
+    "composite": solve_composite_problem,
+    "system": solve_system_problem,
+}
+
+# The fields each solver requires, besides a "function" or "coefficients" for every
+# solver but system.
+REQUIRED_FIELDS = {
+    "newton": ("guess", "accuracy"),
+    "hensel": ("prime", "accuracy"),
+    "congruence": ("prime", "power"),
+    "roots": (),
+    "sweep": ("bound",),
+    "composite": ("modulus",),
+    "system": ("functions", "guess"),
+}
+
+def check_problem(problem):
+    """
+    Raise a ValueError if a problem names no solver or an unknown one, or lacks a field
+    its solver requires.
+
+    :param problem: a dictionary describing the problem
+    """
+    solver = problem.get("solver")
+    if solver is None:
+        raise ValueError("Missing field solver")
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver}; use one of {', '.join(SOLVERS)}")
+
+    missing = [field for field in REQUIRED_FIELDS[solver] if problem.get(field) is None]
+    if solver != "system" and "function" not in problem and "coefficients" not in problem:
+        missing.insert(0, "function")
+    if missing:
+        raise ValueError(f"Missing field {', '.join(missing)}")
+
+def solve_problem(problem, sequence=False):
+    """
+    Given a problem naming its "solver" (newton, hensel, congruence, roots, sweep,
+    composite, or system), check its fields, convert them to their types, solve it, and
+    return the result. Any error is reported in the result instead of being raised, so
+    that one bad problem does not stop a batch, except for a JobTimeout, which is left to
+    the caller that set the timeout. An "id" in the problem is copied to the result.
+
+    :param problem: a dictionary describing the problem
+    :param sequence: boolean to specify if the full sequences should be returned as well
+    :return: a dictionary holding the result or the error
+    """
+    result = {"id": problem["id"]} if "id" in problem else {}
+    result["solver"] = problem.get("solver")
+
+    try:
+        check_problem(problem)
+        problem = convert_fields(problem)
+        result.update(SOLVERS[problem["solver"]](problem, sequence))
+    except JobTimeout:
+        raise
+    except KeyError as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    except Exception as error:
+        result["error"] = str(error) or type(error).__name__
+
+    return result
+
+def encode_result(result):
+    """
+    Return a result as a JSON string. A result which cannot be encoded is replaced by an
+    error holding its "id", "index", and "solver", so that it fails on its own line
+    instead of stopping the rest of the output.
+
+    :param result: a dictionary holding the result or the error
+    :return: the result as a JSON string
+    """
+    try:
+        return json.dumps(result)
+    except (TypeError, ValueError) as error:
+        failure = {key: result[key] for key in ("id", "index", "solver") if key in result}
+        failure["error"] = f"The result could not be written: {error}"
+        return json.dumps(failure)
+
+def allow_long_integers():
+    """
+    Lift Python's limit on the number of digits of an int converted to or from a string,
+    since residues mod p^n and the JSON holding them routinely exceed it.
+    """
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+def read_problems(stream, format):
+    """
+    Given a stream of problems as JSON lines or as CSV with a header row, yield each problem
+    as a dictionary, one line at a time. Blank lines and empty CSV cells are skipped; the
+    remaining cells are left as strings for solve_problem to convert, so that a bad cell
+    fails only its own problem.
+
+    :param stream: a text stream to read problems from
+    :param format: either "jsonl" or "csv"
+    :return: a generator of problem dictionaries
+    """
+    if format == "csv":
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if value not in (None, "")}
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+def run_batch(stream, output, format, sequence=False, workers=None, timeout=None,
+              ordered=True):
+    """
+    Solve every problem read from the stream and write one JSON line per result to the
+    output, in input order. Anything the solvers print is sent to stderr so that the
+    output stays valid JSON lines. If workers is given, the problems are solved in that
+    many processes by parallel.solve_parallel, with the given per-problem timeout and
+    ordering.
+
+    :param stream: a text stream to read problems from
+    :param output: a text stream to write results to
+    :param format: either "jsonl" or "csv"
+    :param sequence: boolean to specify if the full sequences should be returned as well
+    :param workers: the number of worker processes; None to solve in this process
+    :param timeout: the number of seconds each problem may run for; None for no limit
+    :param ordered: boolean to specify if results should be written in input order
+    :return: the number of problems solved
+    """
+    problems = read_problems(stream, format)
+    if workers:
+        from parallel import solve_parallel
+        results = solve_parallel(problems, workers, timeout=timeout, ordered=ordered,
+                                 sequence=sequence)
+    else:
+        results = (solve_problem(problem, sequence) for problem in problems)
+
+    count = 0
+    with redirect_stdout(sys.stderr):
+        for result in results:
+            output.write(encode_result(result) + "\n")
+            count += 1
+    output.flush()
+    return count
+
+def build_parser():
+    """
+    Return the argument parser for the rootfinder command line.
+
+    :return: an argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="rootfinder", description="Find roots by Newton's method, Hensel's lemma, "
+        "solving congruences mod p^n or any modulus, or finding every root of a polynomial at once, "
+        "without any prompts.")
+    parser.add_argument("--batch", metavar="FILE", nargs="?", const="-",
+                        help="solve the problems in FILE (or stdin if omitted) and write "
+                        "one JSON line per result")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="format of the batch input (default: from the file extension, "
+                        "otherwise jsonl)")
+    parser.add_argument("--sequence", action="store_true",
+                        help="also output the full sequence of guesses or residues")
+    parser.add_argument("--workers", type=int,
+                        help="solve batch problems in this many processes")
+    parser.add_argument("--timeout", type=float,
+                        help="seconds each batch problem may run for (with --workers)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write batch results as they finish, each with the index of "
+                        "its problem (with --workers)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write the solver phases, iterations, and counters to FILE "
+                        "as a Chrome trace (worker processes are not traced)")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="keep the lifts of simple p-adic roots in the SQLite database "
+                        "FILE and reuse them across runs")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write cProfile statistics of the run to FILE (worker "
+                        "processes are not profiled)")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--sequence", action="store_true", default=argparse.SUPPRESS,
+                        help="also output the full sequence of guesses or residues")
+    subparsers = parser.add_subparsers(dest="solver")
+
+    newton = subparsers.add_parser("newton", parents=[common],
+                                   help="Newton's method over the reals")
+    newton.add_argument("function")
+    newton.add_argument("--guess", type=float, required=True)
+    newton.add_argument("--accuracy", type=int, required=True,
+                        help="number of accurate decimal places")
+    newton.add_argument("--abs-tol", dest="abs_tol", type=float)
+    newton.add_argument("--rel-tol", dest="rel_tol", type=float)
+    newton.add_argument("--residual-tol", dest="residual_tol", type=float)
+    newton.add_argument("--max-iter", dest="max_iter", type=int)
+    newton.add_argument("--exact", action="store_true",
+                        help="compute the guesses with sympy")
+
+    hensel = subparsers.add_parser("hensel", parents=[common],
+                                   help="Hensel lifting over the p-adics")
+    hensel.add_argument("function")
+    hensel.add_argument("--prime", type=int, required=True)
+    hensel.add_argument("--accuracy", type=int, required=True,
+                        help="number of terms in the sequence; the n-th term is the "
+                        "root mod p^(2^(n-1)), so at most 18 terms for p = 2 and fewer "
+                        "for larger primes")
+    hensel.add_argument("--guess", type=int,
+                        help="root mod p to lift (default: every root mod p)")
+
+    congruence = subparsers.add_parser("congruence", parents=[common],
+                                       help="solve f(x) === 0 (mod p^n)")
+    congruence.add_argument("function")
+    congruence.add_argument("--prime", type=int, required=True)
+    congruence.add_argument("--power", type=int, required=True)
+
+    roots = subparsers.add_parser("roots", parents=[common],
+                                  help="every complex root of a polynomial at once")
+    roots.add_argument("function")
+    roots.add_argument("--tol", type=float, help="absolute tolerance on the step")
+    roots.add_argument("--rel-tol", dest="rel_tol", type=float)
+    roots.add_argument("--max-iter", dest="max_iter", type=int)
+
+    system = subparsers.add_parser("system", parents=[common],
+                                   help="Newton's method for a system of equations")
+    system.add_argument("functions", nargs="+", metavar="function")
+    system.add_argument("--guess", type=float, nargs="+", required=True,
+                        help="one value per unknown")
+    system.add_argument("--variables", nargs="+",
+                        help="names of the unknowns in order (default: every symbol, "
+                        "sorted by name)")
+    system.add_argument("--tol", type=float, help="absolute tolerance on the step")
+    system.add_argument("--rel-tol", dest="rel_tol", type=float)
+    system.add_argument("--residual-tol", dest="residual_tol", type=float)
+    system.add_argument("--max-iter", dest="max_iter", type=int)
+    system.add_argument("--jacobian", choices=["newton", "reuse", "broyden"],
+                        help="evaluate the Jacobian at every step (newton, the default), "
+                        "reuse it, or reuse it with Broyden updates")
+    system.add_argument("--refresh", type=int,
+                        help="largest number of steps between Jacobian evaluations "
+                        "(with reuse or broyden)")
+    system.add_argument("--sparse", action="store_true",
+                        help="compile and factor the Jacobian as a sparse matrix")
+
+    sweep = subparsers.add_parser("sweep", help="solve f(x) === 0 (mod p^n) for every "
+                                  "prime p up to a bound, one JSON line per prime")
+    sweep.add_argument("function")
+    sweep.add_argument("--bound", type=int, required=True, help="largest prime to solve for")
+    sweep.add_argument("--power", type=int, default=1)
+    sweep.add_argument("--all", action="store_true",
+                       help="also output the primes without any solutions")
+
+    composite = subparsers.add_parser("composite", help="solve f(x) === 0 (mod m) for any "
+                                      "modulus m, one JSON line per solution")
+    composite.add_argument("function")
+    composite.add_argument("--modulus", type=int, required=True)
+    composite.add_argument("--count", dest="count_only", action="store_true",
+                           help="only output the number of solutions")
+
+    return parser
+
+def run_composite(arguments):
+    """
+    Solve the congruence of a composite command and write a JSON line with the number of
+    solutions, followed by one JSON line per solution as soon as it is combined (unless
+    only the count was asked for).
+
+    :param arguments: the parsed arguments of the composite command
+    """
+    try:
+        polynomial = check_function(arguments.function, True, coefficients=True)
+        with redirect_stdout(sys.stderr):
+            if arguments.count_only:
+                count = count_composite_congruence_roots(polynomial, arguments.modulus)
+            else:
+                solutions = prime_power_solutions(polynomial, arguments.modulus)
+                count = prod(len(roots) for _, roots in solutions)
+    except ValueError as error:
+        print(json.dumps({"solver": "composite", "error": str(error)}))
+        return
+
+    print(json.dumps({"modulus": arguments.modulus, "count": count}), flush=True)
+    if not arguments.count_only:
+        for root in crt_solutions(solutions):
+            print(json.dumps({"root": root}))
+
+def run_sweep(arguments):
+    """
+    Solve the congruence of a sweep command for every prime up to its bound, on
+    arguments.workers processes if given, and write one JSON line per prime as soon as
+    it is solved.
+
+    :param arguments: the parsed arguments of the sweep command
+    """
+    try:
+        polynomial = check_function(arguments.function, True, coefficients=True)
+    except ValueError as error:
+        print(json.dumps({"solver": "sweep", "error": str(error)}))
+        return
+
+    rows = sweep_primes(polynomial, arguments.bound, arguments.power, arguments.workers)
+    try:
+        for prime, roots, singular in rows:
+            if roots or arguments.all:
+                print(json.dumps({"prime": prime, "roots": roots, "singular": singular}),
+                      flush=True)
+    except ValueError as error:
+        print(json.dumps({"solver": "sweep", "error": str(error)}))
+
+def run(parser, arguments):
+    """
+    Run the command line's batch or single problem, as parsed from the arguments.
+
+    :param parser: the argparse.ArgumentParser the arguments came from
+    :param arguments: the parsed arguments
+    """
+    if arguments.batch is not None:
+        format = arguments.format
+        if format is None:
+            format = "csv" if arguments.batch.endswith(".csv") else "jsonl"
+
+        options = {"workers": arguments.workers, "timeout": arguments.timeout,
+                   "ordered": not arguments.unordered}
+        if arguments.batch == "-":
+            run_batch(sys.stdin, sys.stdout, format, arguments.sequence, **options)
+        else:
+            with open(arguments.batch, newline="") as stream:
+                run_batch(stream, sys.stdout, format, arguments.sequence, **options)
+        return
+
+    if arguments.solver is None:
+        parser.error("a solver or --batch is required")
+    if arguments.solver == "sweep":
+        run_sweep(arguments)
+        return
+    if arguments.solver == "composite":
+        run_composite(arguments)
+        return
+
+    problem = {key: value for key, value in vars(arguments).items()
+               if value is not None and key not in
+               ("batch", "format", "sequence", "workers", "timeout", "unordered",
+                "trace", "profile", "cache")}
+    with redirect_stdout(sys.stderr):
+        result = solve_problem(problem, arguments.sequence)
+    print(encode_result(result))
+
+def main(arguments=None):
+    allow_long_integers()
+    parser = build_parser()
+    arguments = parser.parse_args(arguments)
+
+    with ExitStack() as stack:
+        if arguments.cache:
+            stack.enter_context(caching(arguments.cache))
+        if not (arguments.trace or arguments.profile):
+            run(parser, arguments)
+            return
+        with recording(record_iterations=bool(arguments.trace),
+                       profile=bool(arguments.profile)) as recorder:
+            run(parser, arguments)
+
+    if arguments.trace:
+        recorder.write_chrome_trace(arguments.trace)
+    if arguments.profile:
+        recorder.write_profile(arguments.profile)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from parallel import pack_problem, solve_chunk
+from rootfinder import allow_long_integers, encode_result
+
+BUSY_MESSAGE = "Too many requests in progress"
+
+class ServiceBusy(Exception):
+    """
+    This exception rejects a request made while the service already has as many distinct
+    requests in progress as it allows.
+    """
+
+def problem_key(problem):
+    """
+    Return a string identifying what a problem asks for, ignoring its "id", so that
+    requests for the same solver, polynomial, prime, and precision share one key.
+
+    :param problem: a dictionary describing the problem
+    :return: the problem as canonical JSON without its id
+    """
+    return json.dumps({key: value for key, value in problem.items() if key != "id"},
+                      sort_keys=True, default=str)
+
+class SolverService:
+    """
+    This class solves problems (as accepted by rootfinder.solve_problem) for asyncio code
+    without blocking its event loop. The solving runs on a pool of worker processes, with
+    at most max_running problems submitted to the pool at once. Identical requests made
+    while one of them is in progress are coalesced and all receive the result of a single
+    computation. At most max_pending distinct requests may be in progress; any further
+    request raises ServiceBusy instead of queueing without limit.
+
+    ex) async with SolverService(workers=4) as service:
+            result = await service.solve_newton("x**2 - 2", 1.0, 10)
+    """
+    def __init__(self, workers=None, max_pending=256, max_running=None, timeout=None,
+                 executor=None):
+        """
+        :param workers: the number of worker processes; None for one per CPU
+        :param max_pending: the largest number of distinct requests in progress
+        :param max_running: the largest number of problems submitted to the workers at
+        once; None for twice the number of workers
+        :param timeout: the number of seconds each problem may run for; None for no limit
+        :param executor: an executor to solve on instead of a new process pool; the caller
+        keeps it and shuts it down
+        """
+        workers = workers or os.cpu_count() or 1
+        self.owns_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers)
+        self.max_pending = max_pending
+        self.running = asyncio.Semaphore(max_running or 2 * workers)
+        self.timeout = timeout
+        self.in_flight = {}
+        self.statistics = {"requests": 0, "coalesced": 0, "rejected": 0, "computed": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exception):
+        await self.close()
+
+    async def close(self):
+        """
+        Shut down the worker processes once the problems submitted to them are solved,
+        waiting for them in another thread so that the event loop keeps running. An
+        executor passed in by the caller is left running.
+        """
+        if self.owns_executor:
+            await asyncio.to_thread(self.executor.shutdown, wait=True)
+
+    async def solve(self, problem):
+        """
+        Solve a problem as rootfinder.solve_problem does and return its result, joining the
+        computation of an identical request already in progress if there is one. Errors in
+        the problem are reported in the result; an "id" in the problem is copied to it.
+
+        :param problem: a dictionary describing the problem
+        :return: a dictionary holding the result or the error
+        """
+        self.statistics["requests"] += 1
+        key = problem_key(problem)
+        computation = self.in_flight.get(key)
+
+        if computation is not None:
+            self.statistics["coalesced"] += 1
+        else:
+            if len(self.in_flight) >= self.max_pending:
+                self.statistics["rejected"] += 1
+                raise ServiceBusy(BUSY_MESSAGE)
+            unnamed = {name: value for name, value in problem.items() if name != "id"}
+            computation = asyncio.ensure_future(self.compute(unnamed))
+            self.in_flight[key] = computation
+            computation.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        result = await asyncio.shield(computation)
+        if "id" in problem:
+            return {"id": problem["id"], **result}
+        return dict(result)
+
+    async def compute(self, problem):
+        """
+        Solve a problem on the worker processes once a slot is free, and return its result.
+
+        :param problem: a dictionary describing the problem
+        :return: a dictionary holding the result or the error
+        """
+        async with self.running:
+            self.statistics["computed"] += 1
+            loop = asyncio.get_running_loop()
+            chunk = [(0, pack_problem(problem))]
+            solved = await loop.run_in_executor(self.executor, solve_chunk, chunk, self.timeout)
+            return solved[0][1]
+
+    async def solve_newton(self, function, guess, accuracy, **options):
+        """
+        Run Newton's method on the function from the guess to the given number of decimal
+        places. The options are those of rootfinder.solve_newton_problem.
+
+        :param function: a function as a string
+        :param guess: the initial guess
+        :param accuracy: the number of accurate decimal places
+        :return: a dictionary holding the result or the error
+        """
+        return await self.solve({"solver": "newton", "function": function, "guess": guess,
+                                 "accuracy": accuracy, **options})
+
+    async def solve_hensel(self, function, prime, accuracy, guess=None):
+        """
+        Lift the guess, or every root mod p if there is no guess, by Hensel's lemma.
+
+        :param function: a polynomial as a string
+        :param prime: a prime p
+        :param accuracy: the number of terms in each sequence; the n-th term is the root
+        mod p^(2^(n-1)), and at most hensel_helpers.max_hensel_terms(prime) are allowed
+        :param guess: a root mod p to lift; None for every root mod p
+        :return: a dictionary holding the result or the error
+        """
+        return await self.solve({"solver": "hensel", "function": function, "prime": prime,
+                                 "accuracy": accuracy, "guess": guess})
+
+    async def solve_congruence(self, function, prime, power):
+        """
+        Solve f(x) === 0 (mod p^n).
+
+        :param function: a polynomial as a string
+        :param prime: a prime p
+        :param power: the power of the modulus
+        :return: a dictionary holding the result or the error
+        """
+        return await self.solve({"solver": "congruence", "function": function,
+                                 "prime": prime, "power": power})
+
+async def answer(line, write, service):
+    """
+    Solve the problem on one JSON line with the service and write its result as a JSON
+    line, or an error if the line is not a JSON object, the service is busy, or the result
+    cannot be encoded. Nothing is written if the connection has been closed.
+    """
+    problem = None
+    try:
+        problem = json.loads(line)
+        if not isinstance(problem, dict):
+            raise ValueError("Each line must hold a JSON object")
+        result = await service.solve(problem)
+    except (ValueError, ServiceBusy) as error:
+        result = {"error": str(error)}
+        if isinstance(problem, dict) and "id" in problem:
+            result = {"id": problem["id"], **result}
+
+    try:
+        await write(encode_result(result) + "\n")
+    except ConnectionError:
+        pass
+
+async def serve_lines(read_line, write, service):
+    """
+    Read problems as JSON lines and write each result as a JSON line as soon as it is
+    solved, so results may come out of order (their ids tell them apart). At most
+    max_pending lines are being solved at once; reading waits until one finishes, which
+    holds back the writer of the lines rather than the service.
+
+    :param read_line: an async callable returning the next line, or "" at the end
+    :param write: an async callable writing a string
+    :param service: the SolverService to solve with
+    """
+    window = asyncio.Semaphore(service.max_pending)
+    tasks = set()
+
+    while True:
+        await window.acquire()
+        line = await read_line()
+        if not line or not line.strip():
+            window.release()
+            if not line:
+                break
+            continue
+
+        task = asyncio.create_task(answer(line, write, service))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        task.add_done_callback(lambda _: window.release())
+
+    await asyncio.gather(*tasks)
+
+async def serve_stdin(service):
+    """
+    Serve problems read as JSON lines from stdin, writing the results to stdout.
+
+    :param service: the SolverService to solve with
+    """
+    async def read_line():
+        return await asyncio.to_thread(sys.stdin.readline)
+
+    async def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await serve_lines(read_line, write, service)
+
+async def serve_unix(path, service):
+    """
+    Serve problems as JSON lines over a Unix socket at the given path, answering on each
+    connection with the results of the problems sent on it.
+
+    :param path: the path of the socket to create
+    :param service: the SolverService to solve with
+    """
+    async def connection(reader, writer):
+        async def write(text):
+            writer.write(text.encode())
+            await writer.drain()
+
+        async def read_line():
+            return (await reader.readline()).decode()
+
+        try:
+            await serve_lines(read_line, write, service)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(connection, path=path)
+    async with server:
+        await server.serve_forever()
+
+async def serve(arguments):
+    """
+    Run the server described by the parsed command line arguments until its input ends.
+    """
+    async with SolverService(arguments.workers, arguments.max_pending,
+                             timeout=arguments.timeout) as service:
+        if arguments.socket:
+            await serve_unix(arguments.socket, service)
+        else:
+            await serve_stdin(service)
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Serve rootfinder problems as JSON lines from stdin or a Unix socket, "
+        "solving them on a pool of worker processes.")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="listen on a Unix socket at PATH instead of reading stdin")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--max-pending", dest="max_pending", type=int, default=256,
+                        help="largest number of distinct problems in progress")
+    parser.add_argument("--timeout", type=float, help="seconds each problem may run for")
+    allow_long_integers()
+    asyncio.run(serve(parser.parse_args(arguments)))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
-from sympy import parse_expr, isprime, Symbol
+import re
 from ui_messages import Messages
+from expression_cache import parse_function
+from polynomial_helpers import parse_polynomial
+from finite_field_helpers import is_prime
+from hensel_helpers import max_hensel_terms
 
 def get_newton_info():
     """
@@ -20,18 +24,32 @@ def get_hensel_info():
     """
     Obtain and return the info needed for Hensel's lemma, which includes the polynomial f,
     the initial guess, the number of iterations of Hensel's lemma desired, and a prime p.
+    The initial guess is optional; if the user leaves it blank, it is returned as None and
+    the roots mod p are found automatically.
 
-    :return: a tuple containing the polynomial, initial guess, prime, and accuracy
+    :return: a tuple containing the polynomial, initial guess (or None), prime, and accuracy
     """
     is_hensel = True
 
     polynomial = get_function(Messages.HENSEL_INPUT_MESSAGE.value, is_hensel)
-    initial_guess = get_initial_guess(Messages.INITIAL_GUESS_MESSAGE.value)
-    accuracy = get_accuracy(Messages.HENSEL_ACCURACY_MESSAGE.value)
+    initial_guess = get_optional_initial_guess(Messages.HENSEL_GUESS_MESSAGE.value)
     prime = get_prime(Messages.PRIME_MESSAGE.value)
+    accuracy = get_hensel_accuracy(Messages.HENSEL_ACCURACY_MESSAGE.value, prime)
     
     return polynomial, initial_guess, prime, accuracy
 
+def get_system_info():
+    """
+    Obtain and return the info needed for Newton's method on a system of equations, which
+    includes the functions, their unknowns, and the initial guess.
+
+    :return: a tuple containing the functions, the unknowns, and the initial guess
+    """
+    functions, variables = get_system(Messages.SYSTEM_INPUT_MESSAGE.value)
+    guess = get_vector_guess(Messages.SYSTEM_GUESS_MESSAGE.value, len(variables))
+
+    return functions, variables, guess
+
 def get_p_adic_congruences_info():
     """
     Obtain and return the info needed to obtain a p-adic root by solving congruences mod higher
@@ -47,6 +65,118 @@ def get_p_adic_congruences_info():
 
     return polynomial, prime, power
 
+def get_composite_congruence_info():
+    """
+    Obtain and return the info needed to solve a congruence mod any positive integer, which
+    includes the polynomial f and the modulus m.
+
+    :return: a tuple containing the polynomial and modulus
+    """
+    is_hensel = True
+
+    polynomial = get_function(Messages.HENSEL_INPUT_MESSAGE.value, is_hensel)
+    modulus = get_modulus(Messages.MODULUS_MESSAGE.value)
+
+    return polynomial, modulus
+
+def check_function(function, is_hensel, coefficients=False):
+    """
+    Given a string as a function and whether we are checking for Hensel's Lemma (or not),
+    parse it and return the expression, raising an exception if it is not valid. If
+    coefficients is true, a polynomial with integer coefficients is instead returned as
+    the tuple of its coefficients from parse_polynomial, without importing sympy.
+
+    :param function: the function or polynomial as a string
+    :param is_hensel: boolean to specify if the validation is done for Newton's 
+    method or Hensel's Lemma
+    :param coefficients: boolean to specify if integer polynomials should be returned as
+    tuples of coefficients
+    :return: a parsed expression, which is either a function or a polynomial, or a tuple
+    of int coefficients
+    """
+    if coefficients:
+        parsed = parse_polynomial(function)
+        if parsed is not None:
+            return parsed
+
+    from sympy import Symbol
+    x = Symbol('x')
+    expr = parse_function(function)
+
+    if expr.free_symbols - {x}:
+        raise ValueError("Contains invalid symbols")
+
+    if is_hensel and not expr.is_polynomial(x):
+        raise ValueError("Not a polynomial")
+
+    return expr
+
+def natural_key(name):
+    """
+    Return a key which sorts names with the numbers in them in numerical order.
+
+    ex) "x2" sorts before "x10".
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+def check_system(functions, variables=None):
+    """
+    Given the functions of a system as strings, and optionally the names of its unknowns,
+    parse them and return the expressions and unknowns, raising an exception if the system
+    is not valid. Without names, the unknowns are every symbol in the functions, sorted by
+    name (with numbers in numerical order, so x2 comes before x10).
+
+    :param functions: a list of the functions as strings
+    :param variables: a list of the names of the unknowns; None to find them
+    :return: a tuple containing the tuple of parsed expressions and the tuple of unknowns
+    """
+    from sympy import Symbol
+    expressions = tuple(parse_function(function) for function in functions)
+    symbols = set().union(*(expression.free_symbols for expression in expressions))
+
+    if variables is None:
+        unknowns = tuple(sorted(symbols, key=lambda symbol: natural_key(symbol.name)))
+    else:
+        unknowns = tuple(Symbol(name) for name in variables)
+        if symbols - set(unknowns):
+            raise ValueError("Contains invalid symbols")
+
+    if len(unknowns) != len(expressions) or len(set(unknowns)) != len(unknowns):
+        raise ValueError(f"The system has {len(expressions)} equations in "
+                         f"{len(set(unknowns))} unknowns")
+    return expressions, unknowns
+
+def get_system(message):
+    """
+    Obtain, verify, and iterate until a valid system of equations is obtained, and then
+    return its functions and unknowns.
+
+    :param message: the message to display to the user asking for input
+    :return: a tuple containing the parsed functions and the unknowns
+    """
+    while True:
+        try:
+            return check_system(input(message).split(";"))
+        except Exception:
+            print(Messages.SYSTEM_ERROR_MESSAGE.value)
+
+def get_vector_guess(message, size):
+    """
+    Obtain and return a valid list of floats, one per unknown, as the initial guess.
+
+    :param message: the message to display to the user asking for input
+    :param size: the number of unknowns
+    :return: a list of floats as the initial guess
+    """
+    while True:
+        try:
+            guess = [float(value) for value in input(message).split()]
+            if len(guess) != size:
+                raise ValueError
+            return guess
+        except ValueError:
+            print(Messages.VECTOR_ERROR_MSG.value)
+
 def validate_func(message, function, is_hensel):
     """
     Given a string as a function and whether we checking for Hensel's Lemma (or not), 
@@ -58,23 +188,9 @@ def validate_func(message, function, is_hensel):
     method or Hensel's Lemma
     :return: a parsed expression, which is either a function or a polynomial
     """
-    x = Symbol('x')
-
     while True:
         try:
-            expr = parse_expr(function)
-
-            if expr.free_symbols - {x}:
-                raise ValueError("Contains invalid symbols")
-
-            if is_hensel:
-                if expr.is_polynomial(x):
-                    return expr
-                else:
-                    raise ValueError("Not a polynomial")
-            
-            return expr
-            
+            return check_function(function, is_hensel)
         except Exception:
             print(Messages.FUNCTION_ERROR_MESSAGE.value)
             function = input(message)
@@ -120,6 +236,25 @@ def get_initial_guess(message):
     guess = input(message)
     return validate_guess(message, guess)
 
+def get_optional_initial_guess(message):
+    """
+    Obtain and return a valid int as the initial guess, or None if the user enters
+    nothing. Hensel's iteration lifts a root mod p, so the guess is read as an int and
+    the user is asked again until it is one.
+
+    :param message: the message to display to the user asking for input
+    :return: a valid int as the initial guess; None if left blank
+    """
+    while True:
+        guess = input(message)
+        if not guess.strip():
+            return None
+
+        try:
+            return int(guess)
+        except ValueError:
+            print(Messages.INTEGER_GUESS_ERROR_MSG.value)
+
 def validate_pos_integer(message, guess):
     """
     Given the user's input, keep asking until the input is a valid 
@@ -151,6 +286,25 @@ def get_accuracy(message):
     accuracy = input(message)
     return validate_pos_integer(message, accuracy)
 
+def get_hensel_accuracy(message, prime):
+    """
+    Obtain and return a valid int as the number of terms of Hensel's iteration, asking
+    again while it is above max_hensel_terms(prime), since the n-th term is the root
+    mod p^(2^(n-1)).
+
+    :param message: the message to display to the user asking for input
+    :param prime: the prime p the root is lifted over
+    :return: a valid accuracy as an int
+    """
+    limit = max_hensel_terms(prime)
+    accuracy = get_accuracy(message)
+
+    while accuracy > limit:
+        print(Messages.HENSEL_ACCURACY_ERROR_MESSAGE.value.format(limit))
+        accuracy = get_accuracy(message)
+
+    return accuracy
+
 def get_power(message):
     """
     Obtain and return a valid int as the power.
@@ -161,6 +315,16 @@ def get_power(message):
     power = input(message)
     return validate_pos_integer(message, power)
 
+def get_modulus(message):
+    """
+    Obtain and return a valid int as the modulus.
+
+    :param message: the message to display to the user asking for input
+    :return: a valid modulus as an int
+    """
+    modulus = input(message)
+    return validate_pos_integer(message, modulus)
+
 def verify_prime(message, prime):
     """
     Given the user's input, keep asking until the input is a valid 
@@ -170,7 +334,7 @@ def verify_prime(message, prime):
     :param prime: the first input by the user for the prime
     :return: a valid prime as an int
     """
-    while not isprime(prime):
+    while not is_prime(prime):
         print(Messages.PRIME_ERROR_MESSAGE.value)
         prime = input(message)
         prime = validate_pos_integer(message, prime)
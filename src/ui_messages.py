@@ -9,16 +9,30 @@ class Messages(Enum):
     HENSEL_INPUT_MESSAGE = "Please enter a polynomial with integer coefficients " \
     "(e.g. 2*x**2 + 3x - 1): "
     PRIME_MESSAGE = "Please enter a prime to be the base of the modulus: "
+    SYSTEM_INPUT_MESSAGE = "Please enter the equations of a system separated by " \
+    "semicolons (ex. x**2 + y**2 - 1; x - y): "
     INITIAL_GUESS_MESSAGE = "Please enter an initial guess: "
+    SYSTEM_GUESS_MESSAGE = "Please enter an initial guess, one number per unknown in " \
+    "alphabetical order, separated by spaces: "
+    HENSEL_GUESS_MESSAGE = "Please enter an initial guess (or press Enter to find the " \
+    "roots mod p automatically): "
     MODULUS_POWER_MESSAGE = "Please enter a power of the modulus: "
+    MODULUS_MESSAGE = "Please enter a modulus (any positive integer): "
     
     # Accuracy messages
     NEWTON_ACCURACY_MESSAGE = "Please enter the number of decimal places of the desired root: "
-    HENSEL_ACCURACY_MESSAGE = "Please enter the number of terms desired in the sequence: "
+    HENSEL_ACCURACY_MESSAGE = "Please enter the number of terms desired in the sequence " \
+    "(the n-th term is the root mod p^(2^(n-1))): "
 
     # Error messages
     FUNCTION_ERROR_MESSAGE = "Error parsing the function. Please ensure that your " \
     "function is a valid mathematical expression."
     FLOAT_ERROR_MSG = "Please make sure you enter a valid real number!"
+    SYSTEM_ERROR_MESSAGE = "Error parsing the system. Please ensure that there are as " \
+    "many equations as unknowns."
+    VECTOR_ERROR_MSG = "Please make sure you enter one valid real number per unknown!"
     INT_ERROR_MSG = "Please make sure you enter a valid positive integer!"
-    PRIME_ERROR_MESSAGE = "Please ensure your prime number is actually prime!"
\ No newline at end of file
+    INTEGER_GUESS_ERROR_MSG = "Please make sure you enter a valid integer!"
+    PRIME_ERROR_MESSAGE = "Please ensure your prime number is actually prime!"
+    HENSEL_ACCURACY_ERROR_MESSAGE = "Please enter at most {} terms, since every term is " \
+    "twice as long as the one before it!"
\ No newline at end of file
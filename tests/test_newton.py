@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from expression_cache import parse_function
+from newton import newton_solve, polynomial_roots
+from newton_helpers import Status
+
+def test_step_outside_domain_diverges():
+    # From 0.1 the first step lands at a negative x, where log(x) is undefined.
+    approximations, status = newton_solve(parse_function("x*log(x) - 1"), 0.1, 10)
+    assert status == Status.DIVERGED
+    assert approximations[-1] < 0
+
+def test_division_by_zero_diverges():
+    # The starting guess is the pole itself, so evaluating f divides by zero.
+    _, status = newton_solve(parse_function("1/(x - 2) - 1"), 2.0, 10)
+    assert status == Status.DIVERGED
+
+def test_root_inside_domain_converges():
+    approximations, status = newton_solve(parse_function("x*log(x) - 1"), 2.0, 10)
+    assert status == Status.STEP_TOLERANCE
+    assert abs(approximations[-1] - 1.7632228343518968) < 1e-10
+
+def test_polynomial_roots_converge():
+    roots, bounds, status = polynomial_roots(parse_function("x**3 - 2*x**2 - x + 2"))
+    assert all(code in (Status.STEP_TOLERANCE, Status.RESIDUAL_TOLERANCE) for code in status)
+    assert max(abs(roots - [-1, 1, 2])) < 1e-10